@@ -1,10 +1,18 @@
+from multiprocessing.connection import wait
 from dotenv import load_dotenv
 from aiohttp import web
-from os import environ
+from os import environ, cpu_count
+import multiprocessing
+import signal
+import time
 
-from data.db_functions import db_engine_initializer, db_session_initializer
+from data.db_functions import db_engine_initializer, db_session_initializer, db_session_middleware
 from services.courier_service import CourierService
-from services.order_service import OrderService
+from services.order_service import OrderService, ASSIGN_STRATEGIES
+from services.open_orders import OpenOrdersIndex
+from data.cache import create_cache, close_cache
+from data.metrics import Metrics, metrics_middleware, enable_request_log
+from handlers.metrics_handler import MetricsHandler
 from handlers.courier_handler import CourierHandler
 from handlers.order_handler import OrderHandler
 
@@ -14,32 +22,119 @@ def create_app(db_name=None) -> web.Application:
     if db_name is not None:
         environ['PG_DATABASE'] = db_name
 
-    app = web.Application()
+    app = web.Application(middlewares=[metrics_middleware, db_session_middleware])
+    app['metrics'] = Metrics()
+    if environ.get('REQUEST_LOG', '0') == '1':
+        enable_request_log()
 
-    order_handler = OrderHandler(OrderService())
-    courier_handler = CourierHandler(CourierService())
+    open_orders = app['open_orders'] = OpenOrdersIndex() if environ.get('OPEN_ORDERS_INDEX', '0') == '1' else None
+    assign_strategy = ASSIGN_STRATEGIES[environ.get('ASSIGN_STRATEGY', 'greedy')]()
+    cache = app['cache'] = create_cache()
+    order_handler = OrderHandler(OrderService(assign_strategy, open_orders, cache))
+    courier_handler = CourierHandler(CourierService(cache))
 
     app.cleanup_ctx.extend([
         db_engine_initializer,
         db_session_initializer
     ])
+    if open_orders is not None:
+        app.cleanup_ctx.append(open_orders.initializer)
+    app.on_cleanup.append(close_cache)
 
     app.add_routes([
         web.post('/orders', order_handler.create_orders),
         web.post('/orders/assign', order_handler.assign_order),
+        web.post('/orders/assign/batch', order_handler.assign_orders_batch),
         web.post('/orders/complete', order_handler.complete_order),
+        web.post('/orders/complete/batch', order_handler.complete_orders_batch),
         web.post('/couriers', courier_handler.create_couriers),
         web.patch('/couriers/{courier_id}', courier_handler.patch_courier),
-        web.get('/couriers/{courier_id}', courier_handler.get_courier_info)
+        web.get('/couriers/{courier_id}', courier_handler.get_courier_info),
+        web.get('/metrics', MetricsHandler().get_metrics)
     ])
 
     return app
 
 
+def run_worker(host, port):
+    # every worker builds its own app, so db_engine_initializer gives it its own connection pool
+    web.run_app(create_app(), host=host, port=port, reuse_port=True)
+
+
+def run_workers(workers, host, port, shutdown_timeout=60, restart_delay=1, max_restart_delay=60, stable_after=60,
+                max_crashes=5):
+    context = multiprocessing.get_context('spawn')
+    processes = [None] * workers
+    started_at = [0.0] * workers
+    restart_at = [0.0] * workers
+    crashes = [0] * workers
+    failure = None
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping and failure is None:
+        now = time.monotonic()
+        for i, process in enumerate(processes):
+            if process is not None:
+                if process.is_alive():
+                    continue
+                # a worker that dies soon after its start is crashing, not serving: back off exponentially and give
+                # up once it keeps crashing
+                crashes[i] = crashes[i] + 1 if now - started_at[i] < stable_after else 0
+                restart_at[i] = now + min(restart_delay * 2 ** crashes[i], max_restart_delay)
+                processes[i] = None
+                if crashes[i] >= max_crashes:
+                    failure = f'worker crashed {crashes[i]} times in a row, last exit code {process.exitcode}'
+                    break
+            if now >= restart_at[i]:
+                processes[i] = context.Process(target=run_worker, args=(host, port))
+                processes[i].start()
+                started_at[i] = time.monotonic()
+        else:
+            wait([process.sentinel for process in processes if process is not None], timeout=restart_delay)
+
+    # SIGTERM makes run_app stop accepting connections and run the cleanup contexts
+    for process in processes:
+        if process is not None and process.is_alive():
+            process.terminate()
+    deadline = time.monotonic() + shutdown_timeout
+    for process in processes:
+        if process is not None:
+            process.join(max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+    if failure is not None:
+        raise SystemExit(failure)
+
+
+def workers_count():
+    workers = environ.get('WORKERS', '1')
+    return cpu_count() if workers == 'auto' else int(workers)
+
+
 if __name__ == '__main__':
-    app = create_app()
-    web.run_app(
-        app,
-        host=environ.get('HOST'),
-        port=environ.get('PORT')
-    )
+    load_dotenv()
+    workers = workers_count()
+    if workers == 1:
+        app = create_app()
+        web.run_app(
+            app,
+            host=environ.get('HOST'),
+            port=environ.get('PORT')
+        )
+    else:
+        # per-process state would diverge between workers: an in-memory cache misses other workers'
+        # invalidations and the open orders index misses their new orders
+        environ.setdefault('CACHE_BACKEND', 'none')
+        if environ['CACHE_BACKEND'] == 'memory':
+            raise SystemExit('CACHE_BACKEND=memory cannot be used with WORKERS > 1, use memcached or none')
+        if environ.get('OPEN_ORDERS_INDEX', '0') == '1':
+            raise SystemExit('OPEN_ORDERS_INDEX=1 cannot be used with WORKERS > 1')
+        run_workers(workers, environ.get('HOST'), environ.get('PORT'),
+                    shutdown_timeout=int(environ.get('SHUTDOWN_TIMEOUT', 60)))
@@ -0,0 +1,46 @@
+from argparse import ArgumentParser
+from collections import namedtuple
+from random import Random
+from time import process_time
+
+from benchmarks.common import COURIER_TYPES
+from services.order_service import ASSIGN_STRATEGIES
+
+CandidateOrder = namedtuple('CandidateOrder', ['id', 'weight'])
+
+
+def synthetic_backlog(rnd, size, max_weight):
+    orders = [CandidateOrder(i, rnd.randint(1, max_weight * 100) / 100) for i in range(size)]
+    return sorted(orders, key=lambda order: order.weight)
+
+
+def run(strategy, backlogs, carrying):
+    utilization = 0
+    started = process_time()
+    for orders in backlogs:
+        selected = strategy.select(orders, carrying)
+        utilization += sum(order.weight for order in selected) / carrying
+    elapsed = process_time() - started
+    return utilization / len(backlogs), elapsed / len(backlogs)
+
+
+def main():
+    parser = ArgumentParser(description='Compare assign strategies on synthetic candidate backlogs.')
+    parser.add_argument('--backlog-sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = Random(args.seed)
+    print(f'{"type":<6}{"backlog":>9}{"strategy":>10}{"utilization":>13}{"cpu ms":>10}')
+    for courier_type in COURIER_TYPES:
+        carrying = courier_type['carrying']
+        for size in args.backlog_sizes:
+            backlogs = [synthetic_backlog(rnd, size, carrying) for _ in range(args.runs)]
+            for name, strategy in ASSIGN_STRATEGIES.items():
+                utilization, elapsed = run(strategy(), backlogs, carrying)
+                print(f'{courier_type["title"]:<6}{size:>9}{name:>10}{utilization:>13.2%}{elapsed * 1000:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from datetime import time
+from random import Random
+from uuid import uuid4
+from os import environ
+
+from data.intervals import pack_minutes
+from data.models import Base, Courier, CourierType, CourierInterval, Order, OrderInterval, Region
+
+COURIER_TYPES = [
+    {'id': 1, 'title': 'foot', 'carrying': 10, 'coefficient': 2},
+    {'id': 2, 'title': 'bike', 'carrying': 15, 'coefficient': 5},
+    {'id': 3, 'title': 'car', 'carrying': 50, 'coefficient': 9}
+]
+
+
+def pg_url(database=''):
+    load_dotenv()
+    return URL.create(
+        drivername='postgresql',
+        host=environ['PG_HOST'],
+        port=environ['PG_PORT'],
+        username=environ['PG_USERNAME'],
+        password=environ['PG_PASSWORD'],
+        database=database
+    )
+
+
+@contextmanager
+def temporary_database():
+    name = f'db_{uuid4().hex}_bench'
+    server = create_engine(pg_url(), isolation_level='AUTOCOMMIT')
+    with server.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE {name} ENCODING utf8'))
+    engine = create_engine(pg_url(name), isolation_level='AUTOCOMMIT')
+    try:
+        yield engine, name
+    finally:
+        engine.dispose()
+        with server.connect() as conn:
+            conn.execute(text(f'DROP DATABASE {name}'))
+        server.dispose()
+
+
+def random_interval(rnd):
+    start = rnd.randrange(0, 22 * 60, 5)
+    end = min(start + rnd.randrange(30, 6 * 60, 5), 23 * 60 + 59)
+    return time(start // 60, start % 60), time(end // 60, end % 60)
+
+
+def chunks(rows, size=10000):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def bulk_insert(conn, table, rows):
+    for chunk in chunks(rows):
+        conn.execute(insert(table), chunk)
+
+
+def seed(engine, orders_count, couriers_count, regions_count=100, seed_value=0):
+    rnd = Random(seed_value)
+    Base.metadata.create_all(engine)
+
+    couriers, regions, courier_intervals = [], [], []
+    for courier_id in range(1, couriers_count + 1):
+        type_id = rnd.choice(COURIER_TYPES)['id']
+        for number_region in rnd.sample(range(1, regions_count + 1), rnd.randint(1, 5)):
+            regions.append({'courier_id': courier_id, 'number_region': number_region})
+        intervals = [random_interval(rnd) for _ in range(rnd.randint(1, 3))]
+        for time_start, time_end in intervals:
+            courier_intervals.append({'courier_id': courier_id, 'time_start': time_start, 'time_end': time_end})
+        couriers.append({'id': courier_id, 'type_id': type_id, 'working_minutes': pack_minutes(intervals)})
+
+    orders, order_intervals = [], []
+    for order_id in range(1, orders_count + 1):
+        weight, region_number = rnd.randint(1, 5000) / 100, rnd.randint(1, regions_count)
+        intervals = [random_interval(rnd) for _ in range(rnd.randint(1, 2))]
+        for time_start, time_end in intervals:
+            order_intervals.append({'order_id': order_id, 'time_start': time_start, 'time_end': time_end})
+        orders.append({'id': order_id, 'weight': weight, 'region_number': region_number,
+                       'delivery_minutes': pack_minutes(intervals)})
+
+    with engine.begin() as conn:
+        bulk_insert(conn, CourierType.__table__, COURIER_TYPES)
+        bulk_insert(conn, Courier.__table__, couriers)
+        bulk_insert(conn, Region.__table__, regions)
+        bulk_insert(conn, CourierInterval.__table__, courier_intervals)
+        bulk_insert(conn, Order.__table__, orders)
+        bulk_insert(conn, OrderInterval.__table__, order_intervals)
+        conn.execute(text('ANALYZE'))
@@ -0,0 +1,66 @@
+from argparse import ArgumentParser
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.future import select
+from sqlalchemy import text
+
+from benchmarks.common import temporary_database, seed
+from data.db_functions import assign_candidates_query, create_indexes
+from data.models import Base, Courier, CourierInterval, Order, Region
+
+
+def compile_query(query):
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+def benchmark_queries(courier_id):
+    return {
+        'assign candidates': assign_candidates_query(courier_id, 50),
+        'courier regions': select(Region).where(Region.courier_id == courier_id),
+        'courier intervals': select(CourierInterval).where(CourierInterval.courier_id == courier_id),
+        'courier orders': select(Order).where(Order.courier_id == courier_id),
+        'courier by id': select(Courier).where(Courier.id == courier_id)
+    }
+
+
+def drop_indexes(conn):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.drop(conn, checkfirst=True)
+
+
+def explain(conn, queries):
+    plans = {}
+    for name, query in queries.items():
+        rows = conn.execute(text(f'EXPLAIN (ANALYZE, BUFFERS) {compile_query(query)}')).fetchall()
+        plans[name] = [row[0] for row in rows]
+    return plans
+
+
+def print_plans(title, plans):
+    print(f'===== {title} =====')
+    for name, plan in plans.items():
+        print(f'--- {name}')
+        print('\n'.join(plan))
+
+
+def main():
+    parser = ArgumentParser(description='Show assign and courier fetch query plans before and after indexing.')
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--couriers', type=int, default=5000)
+    parser.add_argument('--courier-id', type=int, default=1)
+    args = parser.parse_args()
+
+    with temporary_database() as (engine, _):
+        seed(engine, args.orders, args.couriers)
+        queries = benchmark_queries(args.courier_id)
+        with engine.connect() as conn:
+            drop_indexes(conn)
+            conn.execute(text('ANALYZE'))
+            print_plans('without indexes', explain(conn, queries))
+            create_indexes(conn)
+            conn.execute(text('ANALYZE'))
+            print_plans('with indexes', explain(conn, queries))
+
+
+if __name__ == '__main__':
+    main()
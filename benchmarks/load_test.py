@@ -0,0 +1,231 @@
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from collections import Counter
+from datetime import datetime, timedelta
+from random import Random
+from math import ceil
+from os import environ
+import subprocess
+import asyncio
+import socket
+import json
+import time
+import sys
+
+from aiohttp import ClientSession, TCPConnector, ClientConnectionError
+
+from benchmarks.common import COURIER_TYPES, temporary_database, seed, random_interval
+
+ROUTES = [
+    'POST /couriers',
+    'POST /orders',
+    'GET /couriers/{courier_id}',
+    'PATCH /couriers/{courier_id}',
+    'POST /orders/assign',
+    'POST /orders/assign/batch',
+    'POST /orders/complete',
+    'POST /orders/complete/batch'
+]
+
+
+def interval_string(rnd):
+    start, end = random_interval(rnd)
+    return f'{start:%H:%M}-{end:%H:%M}'
+
+
+def time_string(value):
+    return f'{value.isoformat()}Z'
+
+
+class Scenario:
+    def __init__(self, rnd, couriers_count, orders_count, regions_count=100, batch_size=10):
+        self.rnd = rnd
+        self.couriers_count = couriers_count
+        self.orders_count = orders_count
+        self.regions_count = regions_count
+        self.batch_size = batch_size
+        self.next_courier_id = couriers_count + 1
+        self.next_order_id = orders_count + 1
+        self.free_couriers = list(range(1, couriers_count + 1))
+        rnd.shuffle(self.free_couriers)
+        self.assigned = []
+
+    def courier_data(self):
+        courier_id, self.next_courier_id = self.next_courier_id, self.next_courier_id + 1
+        return {'courier_id': courier_id, 'courier_type': self.rnd.choice(COURIER_TYPES)['title'],
+                'regions': self.rnd.sample(range(1, self.regions_count + 1), self.rnd.randint(1, 5)),
+                'working_hours': [interval_string(self.rnd) for _ in range(self.rnd.randint(1, 3))]}
+
+    def order_data(self):
+        order_id, self.next_order_id = self.next_order_id, self.next_order_id + 1
+        return {'order_id': order_id, 'weight': self.rnd.randint(1, 5000) / 100,
+                'region': self.rnd.randint(1, self.regions_count),
+                'delivery_hours': [interval_string(self.rnd) for _ in range(self.rnd.randint(1, 2))]}
+
+    def record_assign(self, courier_id, body):
+        if body and body.get('orders'):
+            assign_time = datetime.fromisoformat(body['assign_time'][:-1])
+            self.assigned.append((courier_id, [order['id'] for order in body['orders']], assign_time))
+
+    def complete_data(self, courier_id, order_ids, assign_time):
+        return [{'courier_id': courier_id, 'order_id': order_id,
+                 'complete_time': time_string(assign_time + timedelta(minutes=10 * (i + 1)))}
+                for i, order_id in enumerate(order_ids)]
+
+    def requests(self, route, count):
+        # yields (method, path, json, on_response) tuples; stateful routes stop early when they run out of data
+        for _ in range(count):
+            if route == 'POST /couriers':
+                yield 'POST', '/couriers', {'data': [self.courier_data() for _ in range(self.batch_size)]}, None
+            elif route == 'POST /orders':
+                yield 'POST', '/orders', {'data': [self.order_data() for _ in range(self.batch_size)]}, None
+            elif route == 'GET /couriers/{courier_id}':
+                yield 'GET', f'/couriers/{self.rnd.randint(1, self.couriers_count)}', None, None
+            elif route == 'PATCH /couriers/{courier_id}':
+                patch = {'regions': self.rnd.sample(range(1, self.regions_count + 1), self.rnd.randint(1, 5))}
+                yield 'PATCH', f'/couriers/{self.rnd.randint(1, self.couriers_count)}', patch, None
+            elif route == 'POST /orders/assign':
+                if not self.free_couriers:
+                    return
+                courier_id = self.free_couriers.pop()
+                yield 'POST', '/orders/assign', {'courier_id': courier_id}, (
+                    lambda body, courier_id=courier_id: self.record_assign(courier_id, body))
+            elif route == 'POST /orders/assign/batch':
+                courier_ids = [self.free_couriers.pop() for _ in range(min(self.batch_size, len(self.free_couriers)))]
+                if not courier_ids:
+                    return
+
+                def on_response(body):
+                    for courier_data in (body or {}).get('couriers', []):
+                        self.record_assign(courier_data['courier_id'], courier_data)
+                yield 'POST', '/orders/assign/batch', {'couriers': courier_ids}, on_response
+            elif route == 'POST /orders/complete':
+                if not self.assigned:
+                    return
+                courier_id, order_ids, assign_time = self.assigned.pop()
+                yield 'POST', '/orders/complete', self.complete_data(courier_id, order_ids, assign_time)[0], None
+            elif route == 'POST /orders/complete/batch':
+                if not self.assigned:
+                    return
+                courier_id, order_ids, assign_time = self.assigned.pop()
+                yield 'POST', '/orders/complete/batch', {
+                    'data': self.complete_data(courier_id, order_ids, assign_time)}, None
+
+
+def percentile(latencies, value):
+    return latencies[max(0, ceil(value / 100 * len(latencies)) - 1)] if latencies else None
+
+
+def summarize(latencies, statuses, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        **{f'p{value}_ms': round(percentile(latencies, value) * 1000, 3) if latencies else None
+           for value in (50, 95, 99)}
+    }
+
+
+async def drive(session, url, requests, concurrency):
+    latencies, statuses = [], Counter()
+
+    async def worker():
+        for method, path, body, on_response in requests:
+            started = time.perf_counter()
+            async with session.request(method, url + path, json=body) as response:
+                data = await response.json() if response.status == 200 else None
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status] += 1
+            if on_response is not None:
+                on_response(data)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def wait_ready(session, url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            # /metrics touches neither the database nor the cache, so probing it warms nothing the runs measure
+            async with session.get(f'{url}/metrics'):
+                return
+        except ClientConnectionError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def run(url, scenario, routes, requests_count, concurrency):
+    results = {}
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as session:
+        await wait_ready(session, url)
+        for route in routes:
+            # one shared generator, so the workers split the route's requests between them
+            results[route] = await drive(session, url, scenario.requests(route, requests_count), concurrency)
+            print(f'{route:<32}' + ''.join(f'{key}={value} ' for key, value in results[route].items()),
+                  file=sys.stderr)
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def app_server(database, workers):
+    port = free_port()
+    env = {**environ, 'PG_DATABASE': database, 'HOST': '127.0.0.1', 'PORT': str(port), 'WORKERS': str(workers)}
+    process = subprocess.Popen([sys.executable, 'app.py'], env=env)
+    try:
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        try:
+            process.wait(60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def main():
+    parser = ArgumentParser(description='Seed a temporary database, start app.py against it and load every route.')
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--couriers', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=1000, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=10, help='items per create and batch request')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--routes', nargs='+', default=ROUTES, choices=ROUTES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+
+    started_at = datetime.utcnow().isoformat()
+    with temporary_database() as (engine, database):
+        seed(engine, args.orders, args.couriers, seed_value=args.seed)
+        scenario = Scenario(Random(args.seed), args.couriers, args.orders, batch_size=args.batch_size)
+        with app_server(database, args.workers) as url:
+            results = asyncio.run(run(url, scenario, args.routes, args.requests, args.concurrency))
+
+    report = {
+        'started_at': started_at,
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'environment': {key: environ[key] for key in ('ASSIGN_STRATEGY', 'CACHE_BACKEND', 'OPEN_ORDERS_INDEX')
+                        if key in environ},
+        'routes': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+from argparse import ArgumentParser
+from timeit import timeit
+
+from handlers.simple_handler import SimpleHandler, stdlib_serializer, orjson_serializer, orjson
+
+
+def route_responses(size):
+    order_ids = [{'id': i} for i in range(1, size + 1)]
+    courier = {'courier_id': 1, 'courier_type': 'car', 'regions': list(range(1, 21)),
+               'working_hours': ['09:00-11:00', '11:35-14:05', '16:00-21:30']}
+    return {
+        'POST /orders': {'orders': order_ids},
+        'POST /orders/assign': {'orders': order_ids[:50], 'assign_time': '2021-08-25T01:55:45.442822Z'},
+        'POST /orders/assign/batch': {'couriers': [
+            {'courier_id': i, 'orders': order_ids[:5], 'assign_time': '2021-08-25T01:55:45.442822Z'}
+            for i in range(1, size // 5 + 1)]},
+        'POST /orders/complete': {'order_id': 1},
+        'POST /orders/complete/batch': {'orders': [{'order_id': i, 'status': 200} for i in range(1, size + 1)]},
+        'POST /couriers': {'couriers': order_ids},
+        'PATCH /couriers/{courier_id}': courier,
+        'GET /couriers/{courier_id}': {**courier, 'earnings': 4500, 'rating': 3.75}
+    }
+
+
+def main():
+    parser = ArgumentParser(description='Compare response serializers on the bodies of each route registered in create_app.')
+    parser.add_argument('--size', type=int, default=10000, help='number of ids in bulk responses')
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    serializers = {'stdlib': stdlib_serializer}
+    if orjson is not None:
+        serializers['orjson'] = orjson_serializer
+
+    print(f'{"route":<30}' + ''.join(f'{name:>12}' for name in serializers) + '  (us per response)')
+    for route, json_data in route_responses(args.size).items():
+        timings = []
+        for serializer in serializers.values():
+            handler = SimpleHandler(None, serializer)
+            seconds = timeit(lambda: handler.create_response(json_data, 200), number=args.number)
+            timings.append(seconds / args.number * 1e6)
+        print(f'{route:<30}' + ''.join(f'{timing:>12.1f}' for timing in timings))
+
+
+if __name__ == '__main__':
+    main()
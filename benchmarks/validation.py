@@ -0,0 +1,42 @@
+from argparse import ArgumentParser
+from timeit import timeit
+from random import Random
+
+from validators.compiled_schemes import compiled
+from validators.validate_schemes import CreateOrdersSchema, CreateCouriersSchema
+from benchmarks.common import COURIER_TYPES, random_interval
+
+
+def interval_string(rnd):
+    start, end = random_interval(rnd)
+    return f'{start:%H:%M}-{end:%H:%M}'
+
+
+def payloads(size, rnd):
+    orders = [{'order_id': i, 'weight': round(rnd.uniform(0.01, 50), 2), 'region': rnd.randint(1, 100),
+               'delivery_hours': [interval_string(rnd) for _ in range(rnd.randint(1, 3))]}
+              for i in range(1, size + 1)]
+    couriers = [{'courier_id': i, 'courier_type': rnd.choice(COURIER_TYPES)['title'],
+                 'regions': rnd.sample(range(1, 101), rnd.randint(1, 10)),
+                 'working_hours': [interval_string(rnd) for _ in range(rnd.randint(1, 3))]}
+                for i in range(1, size + 1)]
+    return {CreateOrdersSchema: orders, CreateCouriersSchema: couriers}
+
+
+def main():
+    parser = ArgumentParser(description='Compare marshmallow and compiled schema loading per item.')
+    parser.add_argument('--size', type=int, default=10000, help='number of items per payload')
+    parser.add_argument('--number', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"schema":<24}{"marshmallow":>14}{"compiled":>14}{"speedup":>10}  (us per item)')
+    for schema_class, items in payloads(args.size, Random(0)).items():
+        timings = []
+        for schema in (schema_class(), compiled(schema_class)):
+            seconds = timeit(lambda: [schema.load(item) for item in items], number=args.number)
+            timings.append(seconds / args.number / len(items) * 1e6)
+        print(f'{schema_class.__name__:<24}{timings[0]:>14.2f}{timings[1]:>14.2f}{timings[0] / timings[1]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from time import monotonic
+from os import environ
+import asyncio
+import json
+
+
+class MemoryCache:
+    def __init__(self, maxsize=10000, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if monotonic() < expires_at:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self.entries[key]
+        self.misses += 1
+        return None
+
+    async def version(self, key):
+        return self.versions.get(key, 0)
+
+    async def set(self, key, value, version=None):
+        # a delete after the caller read version means value may be older than the write that caused it
+        if version is not None and self.versions.get(key, 0) != version:
+            return False
+        self.entries[key] = (value, monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.entries.pop(key, None)
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    async def close(self):
+        self.entries.clear()
+
+
+class CacheError(Exception):
+    pass
+
+
+class MemcachedCache:
+    # speaks the get/set/add/incr/delete subset of the memcached text protocol; values are stored as
+    # b'<version>:<json>' and only count as hits while <version> matches the separate 'v:<key>' counter
+    def __init__(self, host='127.0.0.1', port=11211, ttl=30, pool_size=4):
+        self.host = host
+        self.port = port
+        self.ttl = ttl
+        self.pool_size = pool_size
+        self.pool = None
+        self.idle = []
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def execute(self, commands, read):
+        if self.pool is None:
+            self.pool = asyncio.Semaphore(self.pool_size)
+        async with self.pool:
+            if self.idle:
+                reader, writer = self.idle.pop()
+            else:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                writer.write(b''.join(commands))
+                result = await read(reader)
+            except BaseException:
+                writer.close()
+                raise
+            self.idle.append((reader, writer))
+            return result
+
+    async def close(self):
+        while self.idle:
+            _, writer = self.idle.pop()
+            writer.close()
+
+    async def request(self, commands, read, default=None):
+        try:
+            return await self.execute(commands, read)
+        except (OSError, EOFError, CacheError):
+            self.errors += 1
+            return default
+
+    @staticmethod
+    async def read_line(reader):
+        line = await reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise EOFError('connection closed')
+        if line.startswith((b'ERROR', b'CLIENT_ERROR', b'SERVER_ERROR')):
+            raise CacheError(line.decode().strip())
+        return line[:-2]
+
+    @classmethod
+    async def read_values(cls, reader):
+        values = {}
+        while True:
+            line = await cls.read_line(reader)
+            if line == b'END':
+                return values
+            _, key, _, size = line.split()
+            values[key.decode()] = (await reader.readexactly(int(size) + 2))[:-2]
+
+    async def get_values(self, *keys):
+        return await self.request([f'get {" ".join(keys)}\r\n'.encode()], self.read_values, {})
+
+    async def get(self, key):
+        values = await self.get_values(key, f'v:{key}')
+        if key in values:
+            version, payload = values[key].split(b':', 1)
+            if int(version) == int(values.get(f'v:{key}', 0)):
+                self.hits += 1
+                return json.loads(payload)
+        self.misses += 1
+        return None
+
+    async def version(self, key):
+        values = await self.get_values(f'v:{key}')
+        return int(values.get(f'v:{key}', 0))
+
+    async def set(self, key, value, version=None):
+        if version is None:
+            version = await self.version(key)
+        payload = f'{version}:{json.dumps(value)}'.encode()
+        command = f'set {key} 0 {self.ttl} {len(payload)}\r\n'.encode() + payload + b'\r\n'
+        return await self.request([command], self.read_line) == b'STORED'
+
+    async def delete(self, *keys):
+        commands = []
+        for key in keys:
+            commands += [f'add v:{key} 0 0 1\r\n0\r\n'.encode(), f'incr v:{key} 1\r\n'.encode(),
+                         f'delete {key}\r\n'.encode()]
+
+        async def read(reader):
+            return [await self.read_line(reader) for _ in commands]
+        await self.request(commands, read)
+
+
+CACHE_BACKENDS = {
+    'memory': lambda ttl: MemoryCache(int(environ.get('CACHE_SIZE', 10000)), ttl),
+    'memcached': lambda ttl: MemcachedCache(environ.get('CACHE_HOST', '127.0.0.1'),
+                                            int(environ.get('CACHE_PORT', 11211)), ttl,
+                                            int(environ.get('CACHE_POOL_SIZE', 4))),
+    'none': lambda ttl: None
+}
+
+
+def create_cache():
+    return CACHE_BACKENDS[environ.get('CACHE_BACKEND', 'memory')](int(environ.get('CACHE_TTL', 30)))
+
+
+async def close_cache(app):
+    if app['cache'] is not None:
+        await app['cache'].close()
+
+
+def courier_info_key(courier_id):
+    return f'courier_info:{courier_id}'
+
+
+async def invalidate_courier_info(cache, courier_ids):
+    if cache is not None:
+        await cache.delete(*map(courier_info_key, courier_ids))
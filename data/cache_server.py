@@ -0,0 +1,106 @@
+from argparse import ArgumentParser
+from time import monotonic
+import asyncio
+
+# a stand-in for memcached serving the commands MemcachedCache sends, for tests and local runs
+MAX_RELATIVE_EXPTIME = 60 * 60 * 24 * 30
+
+
+class CacheServer:
+    def __init__(self):
+        self.values = {}
+        self.server = None
+        self.connections = set()
+
+    async def start(self, host='127.0.0.1', port=0):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        for writer in self.connections:
+            writer.close()
+        await self.server.wait_closed()
+
+    def lookup(self, key):
+        entry = self.values.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= monotonic():
+            del self.values[key]
+            return None
+        return entry
+
+    def store(self, key, value, exptime):
+        exptime = int(exptime)
+        if exptime > MAX_RELATIVE_EXPTIME:
+            raise ValueError('absolute expiration times are not supported')
+        self.values[key] = (value, monotonic() + exptime if exptime else None)
+
+    def get(self, *keys):
+        response = b''
+        for key in keys:
+            entry = self.lookup(key)
+            if entry is not None:
+                response += f'VALUE {key} 0 {len(entry[0])}\r\n'.encode() + entry[0] + b'\r\n'
+        return response + b'END\r\n'
+
+    def incr(self, key, delta):
+        entry = self.lookup(key)
+        if entry is None:
+            return b'NOT_FOUND\r\n'
+        value = str(int(entry[0]) + int(delta)).encode()
+        self.values[key] = (value, entry[1])
+        return value + b'\r\n'
+
+    def delete(self, key):
+        return b'DELETED\r\n' if self.values.pop(key, None) is not None else b'NOT_FOUND\r\n'
+
+    async def handle(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, *args = line.decode().split()
+                if command in ('set', 'add'):
+                    key, _, exptime, size = args
+                    value = (await reader.readexactly(int(size) + 2))[:-2]
+                    if command == 'add' and self.lookup(key) is not None:
+                        writer.write(b'NOT_STORED\r\n')
+                    else:
+                        self.store(key, value, exptime)
+                        writer.write(b'STORED\r\n')
+                elif command == 'get':
+                    writer.write(self.get(*args))
+                elif command == 'incr':
+                    writer.write(self.incr(*args))
+                elif command == 'delete':
+                    writer.write(self.delete(*args))
+                else:
+                    writer.write(b'ERROR\r\n')
+                await writer.drain()
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            writer.write(f'CLIENT_ERROR {error}\r\n'.encode())
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+
+async def serve(host, port):
+    server = CacheServer()
+    await server.start(host, port)
+    await server.server.serve_forever()
+
+
+def main():
+    parser = ArgumentParser(description='Serve the memcached command subset used by MemcachedCache.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11211)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+from collections import namedtuple
+from sqlalchemy.future import select
+from time import monotonic
+
+from data.models import CourierType
+
+CourierTypeInfo = namedtuple('CourierTypeInfo', ['id', 'title', 'carrying', 'coefficient'])
+COURIER_TYPES_KEY = 'courier_types'
+
+
+class CourierTypeRegistry:
+    def __init__(self, ttl=300, cache=None):
+        self.ttl = ttl
+        self.cache = cache
+        self.by_title = {}
+        self.by_id = {}
+        self.loaded_at = None
+
+    async def load_rows(self, session):
+        result = await session.execute(select(CourierType))
+        return [[courier_type.id, courier_type.title, courier_type.carrying, courier_type.coefficient]
+                for courier_type in result.scalars().all()]
+
+    async def load(self, session):
+        if self.cache is None:
+            rows = await self.load_rows(session)
+        else:
+            rows = await self.cache.get(COURIER_TYPES_KEY)
+            if rows is None:
+                version = await self.cache.version(COURIER_TYPES_KEY)
+                rows = await self.load_rows(session)
+                await self.cache.set(COURIER_TYPES_KEY, rows, version)
+        courier_types = [CourierTypeInfo(*row) for row in rows]
+        self.by_title = {courier_type.title: courier_type for courier_type in courier_types}
+        self.by_id = {courier_type.id: courier_type for courier_type in courier_types}
+        self.loaded_at = monotonic()
+
+    async def invalidate(self):
+        self.loaded_at = None
+        if self.cache is not None:
+            await self.cache.delete(COURIER_TYPES_KEY)
+
+    async def refresh(self, session, type_ids=(), titles=()):
+        if self.loaded_at is None or monotonic() - self.loaded_at > self.ttl:
+            await self.load(session)
+        elif not (self.by_id.keys() >= set(type_ids) and self.by_title.keys() >= set(titles)):
+            # a type added after the last load: drop the shared copy too, it is as stale as ours
+            await self.invalidate()
+            await self.load(session)
+
+    async def get_by_title(self, session, title):
+        await self.refresh(session, titles=[title])
+        return self.by_title.get(title)
+
+    async def get_by_id(self, session, type_id):
+        await self.refresh(session, type_ids=[type_id])
+        return self.by_id.get(type_id)
@@ -1,11 +1,17 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, selectinload
 from sqlalchemy.future import select
+from sqlalchemy import insert, update, any_, bindparam, func, or_, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.engine import URL
 from aiohttp.web_app import Application
+from aiohttp import web
 from os import environ
 
-from data.models import Base, Courier, Order
+from data.models import Base, Courier, Order, Region, courier_rating
+from data.migrations import lock_schema, run_migrations
+from data.courier_types import CourierTypeRegistry
+from data.metrics import instrument_engine
 
 
 async def db_engine_initializer(app: Application):
@@ -17,7 +23,16 @@ async def db_engine_initializer(app: Application):
         username=environ.get('PG_USERNAME'),
         password=environ.get('PG_PASSWORD')
     )
-    app['db_engine']: AsyncEngine = create_async_engine(url, echo=False)
+    app['db_engine']: AsyncEngine = create_async_engine(
+        url,
+        echo=False,
+        pool_size=int(environ.get('PG_POOL_SIZE', 10)),
+        max_overflow=int(environ.get('PG_MAX_OVERFLOW', 20)),
+        pool_pre_ping=environ.get('PG_POOL_PRE_PING', '1') == '1',
+        pool_recycle=int(environ.get('PG_POOL_RECYCLE', 1800)),
+        connect_args={'prepared_statement_cache_size': int(environ.get('PG_STATEMENT_CACHE_SIZE', 100))}
+    )
+    instrument_engine(app['db_engine'].sync_engine)
     yield
     await app['db_engine'].dispose()
 
@@ -25,18 +40,53 @@ async def db_engine_initializer(app: Application):
 async def db_session_initializer(app: Application):
     engine: AsyncEngine = app['db_engine']
     async with engine.begin() as conn:
+        await conn.run_sync(lock_schema)
         await conn.run_sync(Base.metadata.create_all)
-    app['async_session']: AsyncSession = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)()
+        await conn.run_sync(run_migrations)
+        await conn.run_sync(create_indexes)
+    app['async_session_maker'] = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    app['courier_types'] = CourierTypeRegistry(ttl=int(environ.get('COURIER_TYPES_TTL', 300)), cache=app['cache'])
+    async with app['async_session_maker']() as async_session:
+        await app['courier_types'].load(async_session)
 
     yield
-    await app['async_session'].close()
+
+
+def create_indexes(conn):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+@web.middleware
+async def db_session_middleware(request: web.Request, handler):
+    bind = request.app['db_engine']
+    if 'request_stats' in request:
+        bind = bind.execution_options(request_stats=request['request_stats'])
+    async with request.app['async_session_maker'](bind=bind) as async_session:
+        request['async_session']: AsyncSession = async_session
+        return await handler(request)
 
 
 async def save_base(session):
     try:
         await session.commit()
+        return True
     except:
         await session.rollback()
+        return False
+
+
+async def bulk_insert(session, table, rows, chunk_size=5000):
+    for i in range(0, len(rows), chunk_size):
+        await session.execute(insert(table), rows[i:i + chunk_size])
+
+
+async def update_courier_rating(session, courier_id):
+    await session.flush()
+    await session.execute(update(Courier).where(Courier.id == courier_id).values(
+        rating=courier_rating(Courier.id)).execution_options(synchronize_session=False))
 
 
 async def query_results(session, query):
@@ -49,23 +99,120 @@ async def query_result(session, query):
     return result.scalars().first()
 
 
-async def get_courier_by_id(session, courier_id):
-    courier = await query_result(session, select(Courier).where(Courier.id == courier_id).options(
-        *map(selectinload, (
-            Courier.regions,
-            Courier.courier_intervals,
-            Courier.orders,
-            Courier.type))
-    ))
+def any_of(column, values):
+    return column == any_(bindparam(f'{column.key}_values', list(values), type_=ARRAY(column.type)))
+
+
+async def get_existing_values(session, column, values):
+    return set(await query_results(session, select(column).where(any_of(column, values))))
+
+
+COURIER_LOADERS = {
+    'base': (),
+    'info': (Courier.regions,),
+    'active_orders': (Courier.regions, Courier.orders.and_(Order.is_complete == False))
+}
+
+
+async def get_courier_by_id(session, courier_id, loader='base', for_update=False):
+    query = select(Courier).where(Courier.id == courier_id).options(*map(selectinload, COURIER_LOADERS[loader]))
+    if for_update:
+        query = query.with_for_update(of=Courier)
+    courier = await query_result(session, query)
     return courier
 
 
+async def get_couriers_by_ids(session, courier_ids, loader='base', for_update=False):
+    query = select(Courier).where(any_of(Courier.id, courier_ids)).order_by(Courier.id).options(
+        *map(selectinload, COURIER_LOADERS[loader]))
+    if for_update:
+        query = query.with_for_update(of=Courier)
+    return {courier.id: courier for courier in await query_results(session, query)}
+
+
+async def get_orders_by_ids(session, order_ids):
+    orders = await query_results(session, select(Order).where(any_of(Order.id, order_ids)))
+    return {order.id: order for order in orders}
+
+
 async def get_order_by_id(session, order_id, courier_id=None):
     if courier_id is None:
-        query = select(Order).where(Order.id == order_id).options(selectinload(Order.delivery_hours))
+        query = select(Order).where(Order.id == order_id)
     else:
-        query = select(Order).where(Order.id == order_id, Order.courier_id == courier_id).options(
-            selectinload(Order.delivery_hours)
-        )
+        query = select(Order).where(Order.id == order_id, Order.courier_id == courier_id)
     order = await query_result(session, query)
-    return order
\ No newline at end of file
+    return order
+
+
+def assign_candidates_query(courier_id, carrying):
+    query = select(Order).where(
+        Order.is_assign == False,
+        Order.is_complete == False,
+        Order.weight <= carrying,
+        Order.region_number.in_(select(Region.number_region).where(Region.courier_id == courier_id))
+    ).order_by(Order.weight, Order.id)
+    return query
+
+
+async def get_assign_candidates(session, courier_id, carrying):
+    return await query_results(session, assign_candidates_query(courier_id, carrying))
+
+
+async def get_open_orders(session, region_numbers, max_weight):
+    query = select(Order).where(
+        Order.is_assign == False,
+        Order.is_complete == False,
+        Order.weight <= max_weight,
+        any_of(Order.region_number, region_numbers)
+    ).order_by(Order.weight, Order.id)
+    return await query_results(session, query)
+
+
+async def get_taken_order_ids(session, order_ids):
+    return set(await query_results(session, select(Order.id).where(
+        any_of(Order.id, order_ids), or_(Order.is_assign == True, Order.is_complete == True))))
+
+
+async def claim_orders(session, claims, assign_time):
+    # claims maps order ids to the courier that takes them, the couriers ride along as a parallel array
+    # rows locked by a concurrent claim are skipped rather than waited for: a claim holds its rows until commit,
+    # so waiting could deadlock two claims that each refill with the other's rows
+    open_orders = select(Order.id).where(
+        any_of(Order.id, claims),
+        Order.is_assign == False,
+        Order.is_complete == False
+    ).with_for_update(skip_locked=True)
+    couriers = select(
+        func.unnest(bindparam('claim_order_ids', list(claims), type_=ARRAY(Integer))).label('order_id'),
+        func.unnest(bindparam('claim_courier_ids', list(claims.values()), type_=ARRAY(Integer))).label('courier_id')
+    ).subquery()
+    result = await session.execute(update(Order.__table__).where(
+        Order.id.in_(open_orders), Order.id == couriers.c.order_id).values(
+        is_assign=True, courier_id=couriers.c.courier_id, assign_time=assign_time).returning(Order.id))
+    return set(result.scalars().all())
+
+
+async def claim_lightest_orders(session, orders, courier_id, carrying, assign_time):
+    # greedy over the orders still open and not locked by a concurrent claim, lightest first. Rows are locked
+    # as the scan emits them, so the limit, the most of these orders that could fit, also bounds the rows
+    # locked without being taken
+    orders = sorted(orders, key=lambda order: (order.weight, order.id))
+    limit, total = 0, 0
+    for order in orders:
+        if total + order.weight > carrying:
+            break
+        limit, total = limit + 1, total + order.weight
+    if not limit:
+        return set()
+
+    free = select(Order.id, Order.weight).where(
+        any_of(Order.id, [order.id for order in orders]),
+        Order.is_assign == False,
+        Order.is_complete == False
+    ).order_by(Order.weight, Order.id).limit(limit).with_for_update(skip_locked=True).subquery()
+    totals = select(free.c.id, func.sum(free.c.weight).over(order_by=(free.c.weight, free.c.id)).label('total')
+                    ).subquery()
+    fitting = select(totals.c.id).where(totals.c.total <= carrying)
+    result = await session.execute(update(Order.__table__).where(Order.id.in_(fitting)).values(
+        is_assign=True, courier_id=courier_id, assign_time=assign_time).returning(Order.id))
+    return set(result.scalars().all())
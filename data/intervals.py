@@ -0,0 +1,41 @@
+MINUTES_IN_DAY = 24 * 60
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def to_windows(intervals):
+    return [(to_minutes(interval.time_start), to_minutes(interval.time_end)) for interval in intervals]
+
+
+def window_mask(start, end):
+    # one bit per minute of the day, both ends included; windows with start > end cross midnight
+    if start <= end:
+        return ((1 << (end - start + 1)) - 1) << start
+    return window_mask(start, MINUTES_IN_DAY - 1) | window_mask(0, end)
+
+
+def windows_mask(windows):
+    mask = 0
+    for start, end in windows:
+        mask |= window_mask(start, end)
+    return mask
+
+
+def overlaps(courier_windows, order_windows_matrix):
+    courier_mask = windows_mask(courier_windows)
+    return [bool(courier_mask & windows_mask(order_windows)) for order_windows in order_windows_matrix]
+
+
+def pack_minutes(intervals):
+    # flat [start, end, start, end, ...] minutes of the day, the layout of the *_minutes array columns
+    return [to_minutes(value) for interval in intervals for value in interval]
+
+
+def packed_windows(minutes):
+    return list(zip(minutes[::2], minutes[1::2]))
+
+
+def format_window(start, end):
+    return f'{start // 60:02}:{start % 60:02}-{end // 60:02}:{end % 60:02}'
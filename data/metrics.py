@@ -0,0 +1,160 @@
+from contextvars import ContextVar
+from time import perf_counter
+from aiohttp import web
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_cursor
+import logging
+import json
+
+REQUEST_LOGGER = logging.getLogger('app.requests')
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+current_request_stats = ContextVar('current_request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.serialization_time = 0.0
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.statuses = {}
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.total_time = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.serialization_time = 0.0
+
+    def observe(self, status, total_time, stats):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if total_time <= bound:
+                self.buckets[i] += 1
+        self.count += 1
+        self.total_time += total_time
+        self.queries += stats.queries
+        self.db_time += stats.db_time
+        self.rows += stats.rows
+        self.serialization_time += stats.serialization_time
+
+
+class Metrics:
+    def __init__(self):
+        self.routes = {}
+
+    def observe(self, method, route, status, total_time, stats):
+        if (method, route) not in self.routes:
+            self.routes[method, route] = RouteMetrics()
+        self.routes[method, route].observe(status, total_time, stats)
+
+    def render(self, cache=None):
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample_name, labels, value in samples:
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+                lines.append(f'{sample_name}{{{label_text}}} {value}' if labels else f'{sample_name} {value}')
+
+        routes = [({'method': method, 'route': route}, metrics)
+                  for (method, route), metrics in sorted(self.routes.items())]
+        family('http_requests_total', 'counter', 'Requests handled, by route and status.', [
+            ('http_requests_total', {**labels, 'status': status}, count)
+            for labels, metrics in routes for status, count in sorted(metrics.statuses.items())])
+
+        duration = []
+        for labels, metrics in routes:
+            for bound, count in zip(DURATION_BUCKETS, metrics.buckets):
+                duration.append(('http_request_duration_seconds_bucket', {**labels, 'le': bound}, count))
+            duration.append(('http_request_duration_seconds_bucket', {**labels, 'le': '+Inf'}, metrics.count))
+            duration.append(('http_request_duration_seconds_sum', labels, metrics.total_time))
+            duration.append(('http_request_duration_seconds_count', labels, metrics.count))
+        family('http_request_duration_seconds', 'histogram', 'Time from middleware entry to response.', duration)
+
+        for name, attribute, help_text in [
+            ('db_queries_total', 'queries', 'SQL statements executed.'),
+            ('db_query_seconds_total', 'db_time', 'Time spent executing SQL statements.'),
+            ('db_rows_total', 'rows', 'Rows returned or affected by SQL statements.'),
+            ('response_serialization_seconds_total', 'serialization_time', 'Time spent serializing response bodies.')
+        ]:
+            family(name, 'counter', help_text, [
+                (name, labels, getattr(metrics, attribute)) for labels, metrics in routes])
+
+        if cache is not None:
+            for name in ('hits', 'misses', 'errors'):
+                if hasattr(cache, name):
+                    family(f'cache_{name}_total', 'counter', f'Cache {name} in this worker.',
+                           [(f'cache_{name}_total', {}, getattr(cache, name))])
+        return '\n'.join(lines) + '\n'
+
+
+def fetched_rows(cursor):
+    # asyncpg reports no rowcount for SELECT. The SQLAlchemy 1.4 adapter cursor has already fetched the whole
+    # result into its private _rows list when after_cursor_execute runs; test_fetched_rows pins that layout
+    if cursor.rowcount >= 0:
+        return cursor.rowcount
+    if isinstance(cursor, AsyncAdapt_asyncpg_cursor):
+        return len(cursor._rows)
+    return 0
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_started = perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # cursor events run inside SQLAlchemy's greenlet, which does not see the request's contextvars,
+        # so the stats object travels in the execution options of the engine the session is bound to
+        stats = context.execution_options.get('request_stats')
+        if stats is None:
+            return
+        stats.queries += 1
+        stats.db_time += perf_counter() - context.query_started
+        stats.rows += fetched_rows(cursor)
+
+
+def enable_request_log():
+    REQUEST_LOGGER.setLevel(logging.INFO)
+    if not REQUEST_LOGGER.handlers:
+        REQUEST_LOGGER.addHandler(logging.StreamHandler())
+
+
+def route_name(request):
+    route = request.match_info.route
+    return route.resource.canonical if route.resource is not None else 'unmatched'
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
+    stats = request['request_stats'] = RequestStats()
+    token = current_request_stats.set(stats)
+    started = perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as error:
+        status = error.status
+        raise
+    finally:
+        total_time = perf_counter() - started
+        current_request_stats.reset(token)
+        route = route_name(request)
+        request.app['metrics'].observe(request.method, route, status, total_time, stats)
+        if REQUEST_LOGGER.isEnabledFor(logging.INFO):
+            REQUEST_LOGGER.info(json.dumps({
+                'method': request.method, 'route': route, 'path': request.path, 'status': status,
+                'total_ms': round(total_time * 1000, 3), 'queries': stats.queries,
+                'db_ms': round(stats.db_time * 1000, 3), 'rows': stats.rows,
+                'serialization_ms': round(stats.serialization_time * 1000, 3)
+            }))
@@ -0,0 +1,45 @@
+from sqlalchemy import update, text
+
+from data.models import Courier, courier_rating
+
+MIGRATIONS_LOCK_ID = 7310
+
+
+def pack_intervals(table, column, intervals_table, foreign_key):
+    return (f'UPDATE {table} SET {column} = packed.minutes FROM ('
+            f'SELECT {foreign_key}, array_agg(minute ORDER BY id, bound_index) AS minutes FROM {intervals_table}, '
+            f'unnest(ARRAY[extract(epoch FROM time_start)::int / 60, extract(epoch FROM time_end)::int / 60]) '
+            f'WITH ORDINALITY AS bounds(minute, bound_index) GROUP BY {foreign_key}'
+            f') AS packed WHERE {table}.id = packed.{foreign_key}')
+
+MIGRATIONS = [
+    ('0001_courier_rating', [
+        'ALTER TABLE couriers ADD COLUMN IF NOT EXISTS rating FLOAT NOT NULL DEFAULT 0',
+        update(Courier.__table__).values(rating=courier_rating(Courier.__table__.c.id))
+    ]),
+    ('0002_packed_interval_minutes', [
+        "ALTER TABLE couriers ADD COLUMN IF NOT EXISTS working_minutes INTEGER[] NOT NULL DEFAULT '{}'",
+        "ALTER TABLE orders ADD COLUMN IF NOT EXISTS delivery_minutes INTEGER[] NOT NULL DEFAULT '{}'",
+        pack_intervals('couriers', 'working_minutes', 'courier_intervals', 'courier_id'),
+        pack_intervals('orders', 'delivery_minutes', 'order_intervals', 'order_id')
+    ])
+]
+
+
+def lock_schema(conn):
+    # held until the surrounding transaction ends, so concurrently starting workers set up the schema one by one
+    conn.execute(text('SELECT pg_advisory_xact_lock(:lock_id)'), {'lock_id': MIGRATIONS_LOCK_ID})
+
+
+def run_migrations(conn):
+    lock_schema(conn)
+    conn.execute(text('CREATE TABLE IF NOT EXISTS schema_migrations '
+                      '(name VARCHAR PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())'))
+    applied = {row.name for row in conn.execute(text('SELECT name FROM schema_migrations'))}
+
+    for name, statements in MIGRATIONS:
+        if name in applied:
+            continue
+        for statement in statements:
+            conn.execute(text(statement) if isinstance(statement, str) else statement)
+        conn.execute(text('INSERT INTO schema_migrations (name) VALUES (:name)'), {'name': name})
@@ -1,5 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Time, DateTime, Float, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Time, DateTime, Float, Boolean, Index, Numeric, text, func
+from sqlalchemy.future import select
 from sqlalchemy.orm import declarative_base, relation
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from data.intervals import packed_windows, format_window
 
 Base = declarative_base()
 
@@ -22,6 +26,8 @@ class Courier(Base):
     type_id = Column(Integer, ForeignKey('courier_types.id'), nullable=False)
     time_last_complete_order = Column(DateTime, nullable=True)
     earning = Column(Integer, default=0, nullable=False)
+    rating = Column(Float, default=0, nullable=False, index=True)
+    working_minutes = Column(ARRAY(Integer), default=list, server_default='{}', nullable=False)
 
     type = relation('CourierType')
 
@@ -29,17 +35,10 @@ class Courier(Base):
     regions = relation('Region', back_populates='courier')
     courier_intervals = relation('CourierInterval', back_populates='courier')
 
-    @property
-    def rating(self):
-        regions = list(filter(lambda region: region.orders_count != 0, self.regions))
-        min_delivery_time = min([60 * 60] + [region.sum_time / region.orders_count for region in regions])
-        rating = (60 * 60 - min_delivery_time) / 60 / 60 * 5
-        return round(rating, 2)
-
-    def to_dict(self, full_info=False):
-        courier_data = {'courier_id': self.id, 'courier_type': self.type.title,
+    def to_dict(self, courier_type, full_info=False):
+        courier_data = {'courier_id': self.id, 'courier_type': courier_type.title,
                         'regions': [region.number_region for region in self.regions],
-                        'working_hours': [str(interval) for interval in self.courier_intervals]}
+                        'working_hours': [format_window(*window) for window in packed_windows(self.working_minutes)]}
         if full_info:
             courier_data['earnings'] = self.earning
             courier_data['rating'] = self.rating
@@ -56,9 +55,16 @@ class Order(Base):
     is_assign = Column(Boolean, default=False, nullable=False)
     courier_id = Column(Integer, ForeignKey("couriers.id"), nullable=True)
     assign_time = Column(DateTime, nullable=True)
+    delivery_minutes = Column(ARRAY(Integer), default=list, server_default='{}', nullable=False)
 
     courier = relation('Courier')
 
+    __table_args__ = (
+        Index('ix_orders_open_region_weight', 'region_number', 'weight',
+              postgresql_where=text('NOT is_assign AND NOT is_complete')),
+        Index('ix_orders_courier_id_is_complete', 'courier_id', 'is_complete'),
+    )
+
     delivery_hours = relation('OrderInterval', back_populates='order')
 
 
@@ -73,12 +79,23 @@ class Region(Base):
 
     courier = relation('Courier')
 
+    __table_args__ = (
+        Index('ix_regions_courier_id_number_region', 'courier_id', 'number_region'),
+    )
+
+
+def courier_rating(courier_id):
+    min_delivery_time = select(func.min(Region.sum_time.cast(Float) / Region.orders_count)).where(
+        Region.courier_id == courier_id, Region.orders_count != 0).scalar_subquery()
+    rating = (60 * 60 - func.least(60 * 60, func.coalesce(min_delivery_time, 60 * 60))) / 60 / 60 * 5
+    return func.round(rating.cast(Numeric), 2)
+
 
 class CourierInterval(Base):
     __tablename__ = 'courier_intervals'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    courier_id = Column(Integer, ForeignKey('couriers.id'), nullable=False)
+    courier_id = Column(Integer, ForeignKey('couriers.id'), nullable=False, index=True)
     time_start = Column(Time, nullable=False)
     time_end = Column(Time, nullable=False)
 
@@ -92,7 +109,7 @@ class OrderInterval(Base):
     __tablename__ = 'order_intervals'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
     time_start = Column(Time, nullable=False)
     time_end = Column(Time, nullable=False)
 
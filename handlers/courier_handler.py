@@ -1,9 +1,13 @@
 from handlers.simple_handler import SimpleHandler
+from validators.json_stream import is_stream_request
 
 
 class CourierHandler(SimpleHandler):
     async def create_couriers(self, request):
-        json_data, status = await self.service.create_couriers(request)
+        if is_stream_request(request):
+            json_data, status = await self.service.create_couriers_stream(request)
+        else:
+            json_data, status = await self.service.create_couriers(request)
         return self.create_response(json_data, status)
 
     async def patch_courier(self, request):
@@ -0,0 +1,7 @@
+from aiohttp import web
+
+
+class MetricsHandler:
+    async def get_metrics(self, request):
+        body = request.app['metrics'].render(request.app['cache'])
+        return web.Response(text=body, headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
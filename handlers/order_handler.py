@@ -1,16 +1,27 @@
 from handlers.simple_handler import SimpleHandler
+from validators.json_stream import is_stream_request
 
 
 class OrderHandler(SimpleHandler):
     async def create_orders(self, request):
-        json_data, status = await self.service.create_orders(request)
+        if is_stream_request(request):
+            json_data, status = await self.service.create_orders_stream(request)
+        else:
+            json_data, status = await self.service.create_orders(request)
         return self.create_response(json_data, status)
 
     async def assign_order(self, request):
         json_data, status = await self.service.assign_order(request)
         return self.create_response(json_data, status)
 
+    async def assign_orders_batch(self, request):
+        json_data, status = await self.service.assign_orders_batch(request)
+        return self.create_response(json_data, status)
+
     async def complete_order(self, request):
         json_data, status = await self.service.complete_order(request)
         return self.create_response(json_data, status)
 
+    async def complete_orders_batch(self, request):
+        json_data, status = await self.service.complete_orders_batch(request)
+        return self.create_response(json_data, status)
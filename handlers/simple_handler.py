@@ -1,11 +1,41 @@
 from aiohttp import web
+from json import dumps
+from time import perf_counter
+
+from data.metrics import current_request_stats
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def stdlib_serializer(json_data):
+    return dumps(json_data).encode()
+
+
+def orjson_serializer(json_data):
+    try:
+        return orjson.dumps(json_data)
+    except TypeError:
+        # orjson rejects integers beyond 64 bits, which validation errors echo back from the request
+        return stdlib_serializer(json_data)
+
+
+default_serializer = orjson_serializer if orjson is not None else stdlib_serializer
 
 
 class SimpleHandler:
-    def __init__(self, service):
+    def __init__(self, service, serializer=None):
         self.service = service
+        self.serializer = serializer or default_serializer
 
     def create_response(self, json_data, status):
         if json_data is not None:
-            return web.json_response(data=json_data, status=status)
+            started = perf_counter()
+            body = self.serializer(json_data)
+            stats = current_request_stats.get()
+            if stats is not None:
+                stats.serialization_time += perf_counter() - started
+            return web.Response(body=body, status=status, content_type='application/json')
         return web.Response(status=status)
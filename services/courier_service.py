@@ -1,32 +1,81 @@
+from sqlalchemy import delete
+from marshmallow import ValidationError
+
 from validators.courier_validator import CourierValidator
+from validators.compiled_schemes import compiled
+from validators.validate_schemes import GetCourierInfoSchema
+from data.cache import courier_info_key, invalidate_courier_info
+from data.intervals import pack_minutes
 from data.models import Courier, CourierInterval, Region
-from data.db_functions import save_base
+from data.db_functions import save_base, bulk_insert, update_courier_rating
+
+
+def cached_courier_info(func):
+    async def wrapper(service, request):
+        cache = service.courier_info_cache
+        try:
+            if cache is None:
+                raise ValidationError('')
+            key = courier_info_key(compiled(GetCourierInfoSchema).load(request.match_info)['courier_id'])
+        except ValidationError:
+            return await func(service, request)
+
+        courier_data = await cache.get(key)
+        if courier_data is not None:
+            return courier_data, 200
+        version = await cache.version(key)
+        courier_data, status = await func(service, request)
+        if status == 200:
+            await cache.set(key, courier_data, version)
+        return courier_data, status
+    return wrapper
 
 
 class CourierService:
-    @CourierValidator.validate_create_couriers_service
-    async def create_couriers(self, async_session, request_data):
-        for courier_data in request_data['data']:
+    def __init__(self, courier_info_cache=None):
+        self.courier_info_cache = courier_info_cache
+
+    async def _insert_couriers(self, async_session, couriers_data):
+        couriers, regions, courier_intervals = [], [], []
+        for courier_data in couriers_data:
             courier_id = courier_data['courier_id']
             courier_type = courier_data['courier_type']
-            regions = courier_data['regions']
             working_hours = courier_data['working_hours']
 
-            courier = Courier(id=courier_id, type=courier_type)
-            regions = [Region(number_region=region, courier=courier) for region in regions]
+            couriers.append({'id': courier_id, 'type_id': courier_type.id,
+                             'working_minutes': pack_minutes(working_hours)})
+            regions.extend({'number_region': region, 'courier_id': courier_id} for region in courier_data['regions'])
             for time_start, time_end in working_hours:
-                async_session.add(CourierInterval(courier=courier, time_start=time_start, time_end=time_end))
-            async_session.add_all([courier] + regions)
+                courier_intervals.append({'courier_id': courier_id, 'time_start': time_start, 'time_end': time_end})
+
+        await bulk_insert(async_session, Courier.__table__, couriers)
+        await bulk_insert(async_session, Region.__table__, regions)
+        await bulk_insert(async_session, CourierInterval.__table__, courier_intervals)
 
+    @CourierValidator.validate_create_couriers_service
+    async def create_couriers(self, async_session, request_data):
+        await self._insert_couriers(async_session, request_data['data'])
         await save_base(async_session)
         return {'couriers': [{'id': courier['courier_id']} for courier in request_data['data']]}, 201
 
+    @CourierValidator.validate_create_couriers_stream_service
+    async def create_couriers_stream(self, async_session, request_data):
+        courier_ids = []
+        async for couriers_data in request_data['chunks']:
+            await self._insert_couriers(async_session, couriers_data)
+            courier_ids.extend(courier['courier_id'] for courier in couriers_data)
+
+        if request_data['not_validated_ids']:
+            return {'validation_error': {'couriers': [{'id': id} for id in request_data['not_validated_ids']]}}, 400
+        await save_base(async_session)
+        return {'couriers': [{'id': id} for id in courier_ids]}, 201
+
     @CourierValidator.validate_patch_courier_service
     async def patch_courier(self, async_session, request_data):
         courier = request_data['courier']
+        courier_type = request_data['courier_type']
 
-        if 'courier_type' in request_data:
-            courier.type = request_data['courier_type']
+        courier.type_id = courier_type.id
         if 'regions' in request_data:
             regions = request_data['regions']
             courier_region_numbers = {region.number_region: region for region in courier.regions}
@@ -40,28 +89,25 @@ class CourierService:
                     region = Region(number_region=region, courier=courier)
                     async_session.add(region)
                     courier.regions.append(region)
+            await update_courier_rating(async_session, courier.id)
         if 'working_hours' in request_data:
-            courier_intervals = courier.courier_intervals
             intervals = request_data['working_hours']
-            to_delete_intervals = courier_intervals[len(intervals):]
-            for time_start, time_end in intervals[len(courier_intervals):]:
-                interval = CourierInterval(courier=courier, time_start=time_start, time_end=time_end)
-                async_session.add(interval)
-                courier.courier_intervals.append(interval)
-
-            for interval, times in zip(courier_intervals[:len(intervals)], intervals):
-                interval.time_start, interval.time_end = times
-
-            for interval in to_delete_intervals:
-                await async_session.delete(interval)
-                courier.courier_intervals.remove(interval)
+            courier.working_minutes = pack_minutes(intervals)
+            await async_session.execute(delete(CourierInterval.__table__).where(
+                CourierInterval.courier_id == courier.id))
+            await bulk_insert(async_session, CourierInterval.__table__, [
+                {'courier_id': courier.id, 'time_start': time_start, 'time_end': time_end}
+                for time_start, time_end in intervals])
 
         await save_base(async_session)
-        return courier.to_dict(), 200
+        await invalidate_courier_info(self.courier_info_cache, [courier.id])
+        return courier.to_dict(courier_type), 200
 
+    @cached_courier_info
     @CourierValidator.validate_get_courier_info_service
     async def get_courier_info(self, async_session, request_data):
         courier = request_data['courier']
+        courier_type = request_data['courier_type']
 
-        courier_data = courier.to_dict(full_info=courier.earning != 0)
+        courier_data = courier.to_dict(courier_type, full_info=courier.earning != 0)
         return courier_data, 200
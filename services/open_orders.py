@@ -0,0 +1,61 @@
+from collections import namedtuple
+from bisect import bisect_left, insort
+from sqlalchemy.future import select
+
+from data.models import Order
+from data.intervals import packed_windows, windows_mask
+
+OpenOrder = namedtuple('OpenOrder', ['id', 'weight', 'region_number', 'mask'])
+
+
+def open_order(order_data):
+    return OpenOrder(order_data['id'], order_data['weight'], order_data['region_number'],
+                     windows_mask(packed_windows(order_data['delivery_minutes'])))
+
+
+class OpenOrdersIndex:
+    def __init__(self):
+        self.orders = {}
+        self.regions = {}
+
+    async def initializer(self, app):
+        async with app['async_session_maker']() as async_session:
+            await self.load(async_session)
+        yield
+
+    async def load(self, session):
+        result = await session.execute(select(
+            Order.id, Order.weight, Order.region_number, Order.delivery_minutes
+        ).where(Order.is_assign == False, Order.is_complete == False))
+        self.orders, self.regions = {}, {}
+        for order_id, weight, region_number, delivery_minutes in result.all():
+            order = OpenOrder(order_id, weight, region_number, windows_mask(packed_windows(delivery_minutes)))
+            self.orders[order.id] = order
+            self.regions.setdefault(region_number, []).append((weight, order_id))
+        for bucket in self.regions.values():
+            bucket.sort()
+
+    def add(self, orders):
+        for order in orders:
+            self.orders[order.id] = order
+            insort(self.regions.setdefault(order.region_number, []), (order.weight, order.id))
+
+    def remove(self, order_ids):
+        for order_id in order_ids:
+            order = self.orders.pop(order_id, None)
+            if order is not None:
+                bucket = self.regions[order.region_number]
+                del bucket[bisect_left(bucket, (order.weight, order.id))]
+
+    def candidates(self, region_numbers, carrying, courier_mask):
+        # same rows and order as assign_candidates_query, buckets are sorted by (weight, id)
+        candidates = []
+        for region_number in set(region_numbers):
+            for weight, order_id in self.regions.get(region_number, ()):
+                if weight > carrying:
+                    break
+                order = self.orders[order_id]
+                if order.mask & courier_mask:
+                    candidates.append(order)
+        candidates.sort(key=lambda order: (order.weight, order.id))
+        return candidates
@@ -1,74 +1,274 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+from decimal import Decimal
+from math import ceil, floor
 from sqlalchemy.future import select
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
 
-from data.db_functions import save_base, query_results
-from data.models import Order, OrderInterval
+from data.db_functions import (save_base, bulk_insert, get_assign_candidates, get_open_orders, update_courier_rating,
+                               claim_orders, claim_lightest_orders, get_taken_order_ids)
+from data.intervals import pack_minutes, packed_windows, windows_mask, overlaps
+from data.models import Courier, Order, OrderInterval, Region
+from data.cache import invalidate_courier_info
 from validators.order_validator import OrderValidator
+from services.open_orders import open_order
 
 
-class OrderService:
-    def _check_intervals(self, order_intervals, courier_intervals):
-        time_attrs = ['hour', 'minute']
-        for courier_interval in courier_intervals:
-            end_courier = timedelta(**{f'{key}s': getattr(courier_interval.time_end, key) for key in time_attrs})
-            start_courier = timedelta(**{f'{key}s': getattr(courier_interval.time_start, key) for key in time_attrs})
-            for order_interval in order_intervals:
-                end_order = timedelta(**{f'{key}s': getattr(order_interval.time_end, key) for key in time_attrs})
-                start_order = timedelta(**{f'{key}s': getattr(order_interval.time_start, key) for key in time_attrs})
-                if start_courier <= end_order and start_order <= end_courier:
-                    return True
-            return False
+class GreedyAssignStrategy:
+    def select(self, orders, carrying):
+        sum_weight = 0
+        selected = []
+        for order in orders:
+            if sum_weight + order.weight <= carrying:
+                sum_weight += order.weight
+                selected.append(order)
+        return selected
 
-    async def _check_order(self, async_session, order, courier_data):
-        order_intervals = await query_results(async_session, select(OrderInterval).where(OrderInterval.order == order))
-        region_flag = order.region_number in [region.number_region for region in courier_data['regions']]
-        weight_flag = courier_data['sum_weight'] + order.weight <= courier_data['carrying']
-        interval_flag = self._check_intervals(order_intervals, courier_data['intervals'])
-        return region_flag and weight_flag and interval_flag
 
-    @OrderValidator.validate_create_orders_service
-    async def create_orders(self, async_session, request_data):
-        for order_data in request_data['data']:
+class PackingAssignStrategy:
+    def __init__(self, limit=512, precision=100):
+        self.limit = limit
+        self.precision = precision
+
+    def scaled(self, value):
+        return Decimal(str(value)) * self.precision
+
+    def select(self, orders, carrying):
+        # subset-sum over the lightest candidates, weights in hundredths; the rest is packed heaviest first.
+        # weights are rounded up and the capacity down, so finer weights can never overload the courier
+        orders = sorted(orders, key=lambda order: order.weight)
+        packed, rest = orders[:self.limit], orders[self.limit:]
+        capacity = floor(self.scaled(carrying))
+        weights = [ceil(self.scaled(order.weight)) for order in packed]
+
+        capacity_mask = (1 << (capacity + 1)) - 1
+        reachable = 1
+        history = []
+        for weight in weights:
+            history.append(reachable)
+            reachable |= (reachable << weight) & capacity_mask
+
+        best = reachable.bit_length() - 1
+        free = capacity - best
+        selected = []
+        for i in reversed(range(len(packed))):
+            if not history[i] >> best & 1:
+                selected.append(packed[i])
+                best -= weights[i]
+        selected.reverse()
+
+        for order in reversed(rest):
+            weight = ceil(self.scaled(order.weight))
+            if weight <= free:
+                free -= weight
+                selected.append(order)
+        return selected
+
+
+ASSIGN_STRATEGIES = {
+    'greedy': GreedyAssignStrategy,
+    'packing': PackingAssignStrategy
+}
+
+
+class OrderService:
+    def __init__(self, assign_strategy=None, open_orders=None, courier_info_cache=None):
+        self.assign_strategy = assign_strategy or GreedyAssignStrategy()
+        self.open_orders = open_orders
+        self.courier_info_cache = courier_info_cache
+
+    async def _insert_orders(self, async_session, orders_data):
+        orders, order_intervals = [], []
+        for order_data in orders_data:
             order_id = order_data['order_id']
             weight = order_data['weight']
             region = order_data['region']
             delivery_hours = order_data['delivery_hours']
 
-            order = Order(id=order_id, weight=weight, region_number=region)
+            orders.append({'id': order_id, 'weight': weight, 'region_number': region,
+                           'delivery_minutes': pack_minutes(delivery_hours)})
             for time_start, time_end in delivery_hours:
-                async_session.add(OrderInterval(order_id=order_id, time_start=time_start, time_end=time_end))
-            async_session.add(order)
+                order_intervals.append({'order_id': order_id, 'time_start': time_start, 'time_end': time_end})
+
+        await bulk_insert(async_session, Order.__table__, orders)
+        await bulk_insert(async_session, OrderInterval.__table__, order_intervals)
+        return orders
 
-        await save_base(async_session)
+    @OrderValidator.validate_create_orders_service
+    async def create_orders(self, async_session, request_data):
+        orders = await self._insert_orders(async_session, request_data['data'])
+        if await save_base(async_session) and self.open_orders is not None:
+            self.open_orders.add(map(open_order, orders))
         return {'orders': [{'id': order['order_id']} for order in request_data['data']]}, 201
 
+    @OrderValidator.validate_create_orders_stream_service
+    async def create_orders_stream(self, async_session, request_data):
+        order_ids, open_orders = [], []
+        async for orders_data in request_data['chunks']:
+            orders = await self._insert_orders(async_session, orders_data)
+            order_ids.extend(order['id'] for order in orders)
+            # the rows of a chunk are dropped once inserted, only the index entries outlive it
+            if self.open_orders is not None:
+                open_orders.extend(map(open_order, orders))
+
+        if request_data['not_validated_ids']:
+            return {'validation_error': {'orders': [{'id': id} for id in request_data['not_validated_ids']]}}, 400
+        if await save_base(async_session) and self.open_orders is not None:
+            self.open_orders.add(open_orders)
+        return {'orders': [{'id': id} for id in order_ids]}, 201
+
+    def _active_orders(self, courier):
+        return list(filter(lambda order: order.is_assign and not order.is_complete, courier.orders))
+
+    def _assign_data(self, orders, assign_time=None):
+        if orders:
+            assign_time = f'{(assign_time or orders[0].assign_time).isoformat()}Z'
+            return {'orders': [{'id': order.id} for order in orders], 'assign_time': assign_time}
+        return {'orders': []}
+
     @OrderValidator.validate_assign_order_service
     async def assign_order(self, async_session, request_data):
         courier = request_data['courier']
         assign_time = datetime.now()
 
-        courier_orders = list(filter(lambda order: order.is_assign and not order.is_complete, courier.orders))
+        courier_orders = self._active_orders(courier)
         if courier_orders:
-            assign_time = f'{courier_orders[0].assign_time.isoformat()}Z'
-            return {'orders': [{'id': order.id} for order in courier_orders], 'assign_time': assign_time}, 200
-
-        orders = sorted(await query_results(async_session, select(Order).where(
-            Order.is_assign == False, Order.is_complete == False)), key=lambda order: order.weight)
-        courier_data = {'regions': courier.regions, 'intervals': courier.courier_intervals,
-                        'carrying': courier.type.carrying, 'sum_weight': 0}
-        orders_assign = []
+            return self._assign_data(courier_orders), 200
+
+        carrying = request_data['courier_type'].carrying
+        if self.open_orders is not None:
+            return await self._assign_open_orders(async_session, courier, carrying, assign_time)
+
+        orders = await get_assign_candidates(async_session, courier.id, carrying)
+        mask = overlaps(packed_windows(courier.working_minutes),
+                        [packed_windows(order.delivery_minutes) for order in orders])
+        orders = [order for order, overlap in zip(orders, mask) if overlap]
+        claimed, lost_ids = await self._claim(async_session, courier, orders, carrying, assign_time)
+        if not await save_base(async_session):
+            return None, 409
+        await invalidate_courier_info(self.courier_info_cache, [courier.id])
+        return self._assign_data(claimed, assign_time), 200
+
+    async def _claim(self, async_session, courier, candidates, carrying, assign_time):
+        # candidates are read without locks, only the selected orders are claimed and so locked
+        selected = self.assign_strategy.select(candidates, carrying)
+        if not selected:
+            return [], set()
+        claimed_ids = await claim_orders(async_session, {order.id: courier.id for order in selected}, assign_time)
+        claimed = [order for order in selected if order.id in claimed_ids]
+        lost_ids = {order.id for order in selected} - claimed_ids
+        if lost_ids:
+            # claimed by a concurrent assign or another worker: refill the free capacity in one more statement
+            # that skips rows other claims hold, so concurrent refills over the same candidates do not collide
+            carrying -= sum(order.weight for order in claimed)
+            rest = [order for order in candidates if order.id not in lost_ids and order.id not in claimed_ids]
+            refill_ids = await claim_lightest_orders(async_session, rest, courier.id, carrying, assign_time)
+            claimed.extend(order for order in rest if order.id in refill_ids)
+        return claimed, lost_ids
+
+    async def _drop_open_orders(self, async_session, claimed_ids, lost_ids):
+        # runs after commit. Lost orders may be held by a claim that still rolls back, so they leave the index
+        # only once the database shows them taken
+        self.open_orders.remove(claimed_ids)
+        if lost_ids:
+            self.open_orders.remove(await get_taken_order_ids(async_session, lost_ids))
+
+    async def _assign_open_orders(self, async_session, courier, carrying, assign_time):
+        courier_mask = windows_mask(packed_windows(courier.working_minutes))
+        candidates = self.open_orders.candidates([region.number_region for region in courier.regions], carrying,
+                                                 courier_mask)
+        claimed, lost_ids = await self._claim(async_session, courier, candidates, carrying, assign_time)
+        if not await save_base(async_session):
+            return None, 409
+        await self._drop_open_orders(async_session, [order.id for order in claimed], lost_ids)
+        await invalidate_courier_info(self.courier_info_cache, [courier.id])
+        return self._assign_data(claimed, assign_time), 200
+
+    @OrderValidator.validate_assign_orders_batch_service
+    async def assign_orders_batch(self, async_session, request_data):
+        couriers = request_data['couriers']
+        courier_types = request_data['courier_types']
+        assign_time = datetime.now()
+
+        assigned = {courier.id: self._active_orders(courier) for courier in couriers}
+        free_couriers = sorted((courier for courier in couriers if not assigned[courier.id]),
+                               key=lambda courier: courier.id)
+        region_numbers = {region.number_region for courier in free_couriers for region in courier.regions}
+        max_carrying = max((courier_types[courier.id].carrying for courier in free_couriers), default=0)
+        orders = await get_open_orders(async_session, region_numbers, max_carrying) if free_couriers else []
+
+        regions = {}
         for order in orders:
-            if await self._check_order(async_session, order, courier_data):
-                order.assign_time = assign_time
-                order.courier_id = courier.id
-                order.is_assign = True
-                courier_data['sum_weight'] += order.weight
-                orders_assign.append(order)
-        await save_base(async_session)
-        if orders_assign:
-            assign_time = f'{assign_time.isoformat()}Z'
-            return {'orders': [{'id': order.id} for order in orders_assign], 'assign_time': assign_time}, 200
-        return {'orders': []}, 200
+            order_mask = windows_mask(packed_windows(order.delivery_minutes))
+            regions.setdefault(order.region_number, []).append((order, order_mask))
+        carrying = {courier.id: courier_types[courier.id].carrying for courier in free_couriers}
+        taken = set()
+
+        def candidates(courier):
+            courier_mask = windows_mask(packed_windows(courier.working_minutes))
+            orders = [
+                order
+                for region_number in {region.number_region for region in courier.regions}
+                for order, order_mask in regions.get(region_number, [])
+                if order.id not in taken and order.weight <= carrying[courier.id] and courier_mask & order_mask
+            ]
+            orders.sort(key=lambda order: (order.weight, order.id))
+            return orders
+
+        selected = {}
+        for courier in free_couriers:
+            selected[courier.id] = self.assign_strategy.select(candidates(courier), carrying[courier.id])
+            taken.update(order.id for order in selected[courier.id])
+        claims = {order.id: courier_id for courier_id, orders in selected.items() for order in orders}
+        # the orders were read without locks, only the chosen ones are claimed
+        claimed_ids = await claim_orders(async_session, claims, assign_time) if claims else set()
+
+        for courier in free_couriers:
+            orders = selected[courier.id]
+            assigned[courier.id] = [order for order in orders if order.id in claimed_ids]
+            if len(assigned[courier.id]) < len(orders):
+                # a concurrent assign took some of them: one refill over the orders still untaken, skipping the
+                # rows other claims hold
+                carrying[courier.id] -= sum(order.weight for order in assigned[courier.id])
+                rest = candidates(courier)
+                refill_ids = await claim_lightest_orders(async_session, rest, courier.id, carrying[courier.id],
+                                                         assign_time)
+                assigned[courier.id].extend(order for order in rest if order.id in refill_ids)
+                taken.update(refill_ids)
+
+        if not await save_base(async_session):
+            return None, 409
+        if self.open_orders is not None:
+            assigned_ids = [order.id for orders in assigned.values() for order in orders]
+            await self._drop_open_orders(async_session, assigned_ids, claims.keys() - claimed_ids)
+        free_ids = {courier.id for courier in free_couriers}
+        await invalidate_courier_info(self.courier_info_cache, free_ids)
+        return {'couriers': [{'courier_id': courier.id, **self._assign_data(
+            assigned[courier.id], assign_time if courier.id in free_ids else None)} for courier in couriers]}, 200
+
+    async def _complete_order(self, async_session, courier, order, complete_time, coefficient):
+        completed = await async_session.execute(update(Order.__table__).where(
+            Order.id == order.id, Order.is_complete == False).values(is_complete=True).returning(Order.id))
+        if completed.first() is None:
+            return False
+
+        last_time = courier.time_last_complete_order or order.assign_time
+        time_on_delivery = (complete_time - last_time).total_seconds()
+        await async_session.execute(update(Region.__table__).where(
+            Region.courier_id == courier.id, Region.number_region == order.region_number).values(
+            orders_count=Region.orders_count + 1, sum_time=Region.sum_time + time_on_delivery))
+        await update_courier_rating(async_session, courier.id)
+
+        has_active_orders = await async_session.execute(select(select(Order.id).where(
+            Order.courier_id == courier.id, Order.is_complete == False).exists()))
+        if has_active_orders.scalar():
+            courier_values = {'time_last_complete_order': complete_time}
+        else:
+            courier_values = {'time_last_complete_order': None, 'earning': Courier.earning + 500 * coefficient}
+        await async_session.execute(update(Courier.__table__).where(
+            Courier.id == courier.id).values(**courier_values))
+        set_committed_value(courier, 'time_last_complete_order', courier_values['time_last_complete_order'])
+        return True
 
     @OrderValidator.validate_complete_order_service
     async def complete_order(self, async_session, request_data):
@@ -77,21 +277,30 @@ class OrderService:
         order = request_data['order']
 
         if not order.is_complete:
-            if courier.time_last_complete_order is None:
-                time_on_delivery = (complete_time - order.assign_time).total_seconds()
-            else:
-                time_on_delivery = (complete_time - courier.time_last_complete_order).total_seconds()
-            order.is_complete = True
-            region = {region.number_region: region for region in courier.regions}[order.region_number]
-            region.orders_count += 1
-            region.sum_time += time_on_delivery
-            courier.time_last_complete_order = complete_time
-            await save_base(async_session)
-
-            not_complete_orders = list(filter(lambda order: not order.is_complete, courier.orders))
-            if not not_complete_orders:
-                courier.earning += 500 * courier.type.coefficient
-                courier.time_last_complete_order = None
-                await save_base(async_session)
+            coefficient = request_data['courier_type'].coefficient
+            if await self._complete_order(async_session, courier, order, complete_time, coefficient):
+                if not await save_base(async_session):
+                    return None, 409
+                await invalidate_courier_info(self.courier_info_cache, [courier.id])
 
         return {'order_id': order.id}, 200
+
+    @OrderValidator.validate_complete_orders_batch_service
+    async def complete_orders_batch(self, async_session, request_data):
+        items = sorted(request_data['data'], key=lambda item: (item['courier'].id, item['complete_time']))
+        for item in items:
+            courier = item['courier']
+            order = item['order']
+            complete_time = item['complete_time']
+
+            if complete_time <= (courier.time_last_complete_order or order.assign_time):
+                item['response']['status'] = 400
+                continue
+            if not order.is_complete:
+                coefficient = item['courier_type'].coefficient
+                await self._complete_order(async_session, courier, order, complete_time, coefficient)
+
+        if not await save_base(async_session):
+            return None, 409
+        await invalidate_courier_info(self.courier_info_cache, {item['courier'].id for item in items})
+        return {'orders': request_data['results']}, 200
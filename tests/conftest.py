@@ -7,6 +7,7 @@ from uuid import uuid4
 from os import environ
 
 from app import create_app
+from tests.query_budget import QueryBudgetMonitor
 from data.models import Base, CourierType
 
 
@@ -65,9 +66,11 @@ def pg_connection(tmp_db_name):
 @pytest.fixture
 async def client(aiohttp_client, tmp_db_name, pg_connection):
     app = create_app(db_name=tmp_db_name)
+    query_budget = QueryBudgetMonitor(app)
     client = await aiohttp_client(app)
 
     try:
         yield client
     finally:
         await client.close()
+    query_budget.check()
@@ -5,6 +5,7 @@ from os import path
 
 from data.models import Courier, Order, CourierInterval, OrderInterval, Region, CourierType
 from validators.validate_schemes import CreateCouriersSchema, CreateOrdersSchema
+from data.intervals import pack_minutes
 
 
 def get_stub(name):
@@ -39,7 +40,8 @@ def create_couriers(conn, data_courier):
         result = CreateCouriersSchema().load(courier)
         courier_id = result['courier_id']
         courier_type = conn.execute(select(CourierType).where(CourierType.title == result['courier_type'])).fetchone()
-        conn.execute(insert(Courier.__table__).values(id=courier_id, type_id=courier_type.id))
+        conn.execute(insert(Courier.__table__).values(id=courier_id, type_id=courier_type.id,
+                                                      working_minutes=pack_minutes(result['working_hours'])))
         create_regions(conn, result['regions'], courier_id)
         create_intervals(conn, 'c', result['working_hours'], courier_id)
 
@@ -50,7 +52,8 @@ def create_orders(conn, data_order):
         order_id = result['order_id']
         weight = result['weight']
         region = result['region']
-        conn.execute(insert(Order.__table__).values(id=order_id, weight=weight, region_number=region))
+        conn.execute(insert(Order.__table__).values(id=order_id, weight=weight, region_number=region,
+                                                    delivery_minutes=pack_minutes(result['delivery_hours'])))
         create_intervals(conn, 'o', result['delivery_hours'], order_id)
 
 
@@ -0,0 +1,115 @@
+from math import ceil
+from aiohttp import web
+from sqlalchemy import event
+import pytest
+
+from validators.json_stream import STREAM_CHUNK_SIZE, is_stream_request
+
+
+class QueryBudget:
+    def __init__(self, base, per_item=0, items=None):
+        self.base = base
+        self.per_item = per_item
+        self.items = items
+
+    def limit(self, payload):
+        if self.items is None:
+            return self.base
+        return self.base + self.per_item * self.items(payload if isinstance(payload, dict) else {})
+
+
+def chunks(key):
+    # create routes validate and insert their items in chunks; invalid payloads still cost one chunk
+    def count(payload):
+        items = payload.get(key)
+        return max(1, ceil(len(items) / STREAM_CHUNK_SIZE) if isinstance(items, (list, range)) else 1)
+    return count
+
+
+def items(key):
+    def count(payload):
+        items = payload.get(key)
+        return len(items) if isinstance(items, (list, range)) else 0
+    return count
+
+
+async def request_payload(request):
+    if is_stream_request(request):
+        # the handler consumed the stream; every item takes at least two bytes and a separator
+        return {'data': range(ceil(request.content.total_bytes / 3))}
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+# statements per request, including a reload of the courier types registry after its ttl runs out
+QUERY_BUDGETS = {
+    ('POST', '/orders'): QueryBudget(0, 3, chunks('data')),
+    ('POST', '/couriers'): QueryBudget(0, 5, chunks('data')),
+    ('GET', '/couriers/{courier_id}'): QueryBudget(3),
+    # asyncpg has no executemany with RETURNING, so the orm inserts every new region on its own
+    ('PATCH', '/couriers/{courier_id}'): QueryBudget(9, 1, items('regions')),
+    # one claim of the strategy's selection, plus one refill and one check of the lost orders after commit when a
+    # concurrent assign took some of it
+    ('POST', '/orders/assign'): QueryBudget(8),
+    # one claim for the whole batch, one refill per courier that lost orders to a concurrent assign and one check of
+    # the lost orders after commit
+    ('POST', '/orders/assign/batch'): QueryBudget(7, 1, items('couriers')),
+    ('POST', '/orders/complete'): QueryBudget(8),
+    ('POST', '/orders/complete/batch'): QueryBudget(3, 5, items('data')),
+    ('GET', '/metrics'): QueryBudget(0)
+}
+DECLARED_BUDGETS = {key: (budget.base, budget.per_item) for key, budget in QUERY_BUDGETS.items()}
+# a test may loosen a declared budget by this many statements at most, anything more belongs in QUERY_BUDGETS
+MAX_BUDGET_OVERRIDE = 2
+
+
+class QueryBudgetMonitor:
+    def __init__(self, app, budgets=None):
+        self.budgets = QUERY_BUDGETS if budgets is None else budgets
+        self.statements = {}
+        self.violations = []
+        # after metrics_middleware, which creates the request stats the engine listener counts into
+        app.middlewares.insert(1, self.middleware)
+        app.on_startup.append(self.listen)
+
+    async def listen(self, app):
+        event.listen(app['db_engine'].sync_engine, 'after_cursor_execute', self.after_cursor_execute)
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        log = self.statements.get(context.execution_options.get('request_stats'))
+        if log is not None:
+            log.append(statement)
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        stats = request['request_stats']
+        log = self.statements[stats] = []
+        try:
+            response = await handler(request)
+        finally:
+            del self.statements[stats]
+
+        route = request.match_info.route.resource
+        key = (request.method, route.canonical if route is not None else None)
+        if key not in self.budgets:
+            self.violations.append(f'{request.method} {request.path}: no query budget declared for the route')
+            return response
+
+        budget = self.budgets[key]
+        if key in DECLARED_BUDGETS:
+            base, per_item = DECLARED_BUDGETS[key]
+            if budget.base > base + MAX_BUDGET_OVERRIDE or budget.per_item > per_item + MAX_BUDGET_OVERRIDE:
+                self.violations.append(f'{request.method} {request.path}: budget overridden to '
+                                       f'({budget.base}, {budget.per_item}), declared is ({base}, {per_item})')
+
+        limit = budget.limit(await request_payload(request))
+        if stats.queries > limit:
+            self.violations.append('\n    '.join([
+                f'{request.method} {request.path}: {stats.queries} queries, budget is {limit}', *log]))
+        return response
+
+    def check(self):
+        if self.violations:
+            pytest.fail('query budget exceeded:\n' + '\n'.join(self.violations), pytrace=False)
@@ -0,0 +1,51 @@
+from datetime import time
+from itertools import product
+
+import pytest
+from marshmallow import ValidationError
+
+from validators.compiled_schemes import compiled, load_interval
+from validators.validate_schemes import (CreateOrdersSchema, CreateCouriersSchema, PatchCourierSchema,
+                                        CompleteOrderSchema)
+
+VALUES = [None, True, False, 0, 12, -5, 1.5, 0.01, 0.009, 50, 50.0001, 10 ** 400, float('nan'), float('inf'), '12',
+          ' 7 ', '1.5', '1_000', 'a', '', 'foot', [], {}, '09:00-18:00', '9:00-18:00', '1:5-2:7', '24:00-01:00',
+          '09:60-10:00', '09:00', '0900-1800', '09:00-18:00 ', '09:00-18:00-20:00', '2021-01-10T10:33:01.42Z']
+
+VALID = {
+    CreateOrdersSchema: {'order_id': 1, 'weight': 0.23, 'region': 12, 'delivery_hours': ['09:00-18:00']},
+    CreateCouriersSchema: {'courier_id': 1, 'courier_type': 'foot', 'regions': [1, 2],
+                           'working_hours': ['11:35-14:05']},
+    PatchCourierSchema: {'courier_id': 1, 'regions': [1, 2]},
+    CompleteOrderSchema: {'courier_id': 1, 'order_id': 2, 'complete_time': '2021-01-10T10:33:01.42Z'}
+}
+
+
+def load(schema, data):
+    try:
+        return schema.load(data)
+    except ValidationError:
+        return ValidationError
+
+
+def variants(data):
+    yield data
+    yield []
+    yield {**data, 'unknown': 1}
+    for key, value in product(data, VALUES + [[value] for value in VALUES]):
+        yield {**data, key: value}
+    for key in data:
+        yield {name: value for name, value in data.items() if name != key}
+
+
+@pytest.mark.parametrize('schema_class', VALID)
+def test_compiled_schema_parity(schema_class):
+    for data in variants(VALID[schema_class]):
+        assert load(compiled(schema_class), data) == load(schema_class(), data), data
+
+
+def test_load_interval():
+    assert load_interval('9:05-23:59') == [time(9, 5), time(23, 59)]
+    for interval in ['24:00-01:00', '09:00-1800', '09:00 -10:00', '-10:00', 900]:
+        with pytest.raises(ValidationError):
+            load_interval(interval)
@@ -0,0 +1,54 @@
+import pytest
+from unittest.mock import patch
+
+from tests.functions_for_testing import get_stub, create_couriers
+from data.cache import MemoryCache
+
+
+@pytest.mark.asyncio
+async def test_memory_cache():
+    cache = MemoryCache(maxsize=2, ttl=30)
+    await cache.set('a', 1)
+    await cache.set('b', 2)
+    assert await cache.get('a') == 1
+    await cache.set('c', 3)
+
+    assert await cache.get('b') is None
+    assert (await cache.get('a'), await cache.get('c')) == (1, 3)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    version = await cache.version('a')
+    await cache.delete('a')
+    assert not await cache.set('a', 1, version)
+    assert await cache.set('a', 1, await cache.version('a'))
+
+    with patch('data.cache.monotonic', return_value=10 ** 9):
+        assert await cache.get('a') is None
+
+
+@pytest.mark.asyncio
+async def test_cached_courier_info(client, pg_connection):
+    create_couriers(pg_connection, get_stub('success_create_couriers.json'))
+    cache = client.server.app['cache']
+    hits, misses = cache.hits, cache.misses
+
+    response1 = await client.get('/couriers/1')
+    response2 = await client.get('/couriers/1')
+    assert response1.status == response2.status == 200
+    assert await response1.json() == await response2.json()
+    assert (cache.hits - hits, cache.misses - misses) == (1, 1)
+
+    response = await client.patch('/couriers/1', json={'regions': [5]})
+    assert response.status == 200
+
+    response = await client.get('/couriers/1')
+    body = await response.json()
+    assert body['regions'] == [5]
+    assert (cache.hits - hits, cache.misses - misses) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_invalid_courier_id_is_not_cached(client, pg_connection):
+    response = await client.get('/couriers/kek')
+    assert response.status == 400
+    assert not [key for key in client.server.app['cache'].entries if key.startswith('courier_info:')]
@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy.future import select
+from json import dumps
+
+from data.models import Courier, Region
+from tests.functions_for_testing import get_stub
+
+
+@pytest.mark.asyncio
+async def test_success_create_couriers_stream(client, pg_connection):
+    data = get_stub('success_create_couriers.json')
+    response = await client.post('/couriers?stream=1', data=dumps(data), headers={'Content-Type': 'application/json'})
+    couriers = pg_connection.execute(select(Courier)).fetchall()
+
+    assert response.status == 201
+    assert await response.json() == {'couriers': [{'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}]}
+    assert len(couriers) == 4
+
+
+@pytest.mark.asyncio
+async def test_success_create_couriers_ndjson(client, pg_connection):
+    data = get_stub('success_create_couriers.json')
+    body = '\n'.join(dumps(courier_data) for courier_data in data['data'])
+    response = await client.post('/couriers', data=body, headers={'Content-Type': 'application/x-ndjson'})
+    regions = pg_connection.execute(select(Region)).fetchall()
+
+    assert response.status == 201
+    assert await response.json() == {'couriers': [{'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}]}
+    assert len(regions) == sum(len(courier_data['regions']) for courier_data in data['data'])
+
+
+@pytest.mark.asyncio
+async def test_malformed_items_create_couriers_stream(client, pg_connection):
+    data = get_stub('success_create_couriers.json')
+    data['data'][1:1] = [12345, {'courier_type': 'foot'}, [1, 2]]
+    body = '\n'.join(dumps(courier_data) for courier_data in data['data'])
+    response = await client.post('/couriers', data=body, headers={'Content-Type': 'application/x-ndjson'})
+    couriers = pg_connection.execute(select(Courier)).fetchall()
+
+    assert response.status == 400
+    assert await response.json() == {'validation_error': {'couriers': [{'id': None}, {'id': None}, {'id': None}]}}
+    assert couriers == []
+
+
+@pytest.mark.asyncio
+async def test_malformed_create_couriers_stream(client, pg_connection):
+    response = await client.post('/couriers?stream=1', data='{"data": [{"courier_id": 1,',
+                                 headers={'Content-Type': 'application/json'})
+    couriers = pg_connection.execute(select(Courier)).fetchall()
+
+    assert response.status == 400
+    assert couriers == []
@@ -1,4 +1,5 @@
 import pytest
+import asyncio
 from datetime import timedelta, datetime
 from sqlalchemy.future import select
 from sqlalchemy import update
@@ -23,7 +24,8 @@ async def test_success_get_courier_info(client, pg_connection):
     pg_connection.execute(update(Region.__table__).where(
         Region.courier_id == data_complete['courier_id'], Region.number_region == order.region_number).values(
         orders_count=1, sum_time=td.total_seconds()))
-    pg_connection.execute(update(Courier).where(Courier.id == data_complete['courier_id']).values(earning=1000))
+    pg_connection.execute(update(Courier).where(Courier.id == data_complete['courier_id']).values(
+        earning=1000, rating=3.75))
 
     response = await client.get('/couriers/1')
     courier = pg_connection.execute(select(Courier).where(Courier.id == 1)).fetchone()
@@ -64,3 +66,17 @@ async def test_validation_courier_id(client, pg_connection):
 
     response = await client.get('/couriers/kek')
     assert response.status == 400
+
+
+@pytest.mark.asyncio
+async def test_concurrent_get_courier_info(client, pg_connection):
+    data_couriers = get_stub('success_create_couriers.json')
+
+    create_couriers(pg_connection, data_couriers)
+
+    responses = await asyncio.gather(*[client.get(f'/couriers/{i % 4 + 1}') for i in range(40)])
+    bodies = await asyncio.gather(*[response.json() for response in responses])
+
+    assert all(response.status == 200 for response in responses)
+    for i, body in enumerate(bodies):
+        assert body['courier_id'] == i % 4 + 1
@@ -0,0 +1,74 @@
+import pytest
+
+from tests.functions_for_testing import get_stub, create_couriers
+from data.cache_server import CacheServer
+from data.cache import MemcachedCache
+from app import create_app
+
+
+@pytest.fixture
+async def cache_server():
+    server = CacheServer()
+    port = await server.start()
+    try:
+        yield port
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_memcached_cache(cache_server):
+    worker1, worker2 = MemcachedCache(port=cache_server), MemcachedCache(port=cache_server)
+
+    version = await worker1.version('courier_info:1')
+    assert await worker1.set('courier_info:1', {'courier_id': 1}, version)
+    assert await worker2.get('courier_info:1') == {'courier_id': 1}
+
+    await worker2.delete('courier_info:1', 'courier_info:2')
+    assert await worker1.get('courier_info:1') is None
+    assert await worker1.set('courier_info:1', {'courier_id': 1}, version)
+    assert await worker2.get('courier_info:1') is None
+
+    assert await worker1.set('courier_info:1', {'courier_id': 1})
+    assert await worker2.get('courier_info:1') == {'courier_id': 1}
+    assert (worker2.hits, worker2.misses, worker2.errors) == (2, 1, 0)
+
+    await worker1.close()
+    await worker2.close()
+
+
+@pytest.mark.asyncio
+async def test_memcached_cache_unavailable(cache_server):
+    cache = MemcachedCache(port=cache_server)
+    await cache.set('courier_info:1', {'courier_id': 1})
+    await cache.close()
+
+    cache.port = 1
+    assert await cache.get('courier_info:1') is None
+    await cache.delete('courier_info:1')
+    assert cache.errors == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_between_workers(aiohttp_client, tmp_db_name, pg_connection, cache_server, monkeypatch):
+    monkeypatch.setenv('CACHE_BACKEND', 'memcached')
+    monkeypatch.setenv('CACHE_PORT', str(cache_server))
+    create_couriers(pg_connection, get_stub('success_create_couriers.json'))
+    worker1 = await aiohttp_client(create_app(db_name=tmp_db_name))
+    worker2 = await aiohttp_client(create_app(db_name=tmp_db_name))
+
+    try:
+        response = await worker1.get('/couriers/1')
+        assert (await response.json())['regions'] == [1, 12, 22]
+        response = await worker2.get('/couriers/1')
+        assert (await response.json())['regions'] == [1, 12, 22]
+        assert worker2.server.app['cache'].hits >= 1
+
+        response = await worker2.patch('/couriers/1', json={'regions': [5]})
+        assert response.status == 200
+
+        response = await worker1.get('/couriers/1')
+        assert (await response.json())['regions'] == [5]
+    finally:
+        await worker1.close()
+        await worker2.close()
@@ -0,0 +1,35 @@
+import pytest
+from types import SimpleNamespace
+
+from data.courier_types import CourierTypeRegistry
+from data.cache import MemoryCache
+
+
+class FakeSession:
+    def __init__(self, courier_types):
+        self.courier_types = courier_types
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        rows = [SimpleNamespace(id=id, title=title, carrying=carrying, coefficient=coefficient)
+                for id, title, carrying, coefficient in self.courier_types]
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: rows))
+
+
+@pytest.mark.asyncio
+async def test_courier_types_reload_on_miss():
+    session = FakeSession([(1, 'foot', 10, 2)])
+    courier_types = CourierTypeRegistry(ttl=300, cache=MemoryCache())
+    await courier_types.load(session)
+
+    session.courier_types.append((2, 'scooter', 20, 3))
+    assert (await courier_types.get_by_id(session, 1)).title == 'foot'
+    assert session.queries == 1
+    assert (await courier_types.get_by_id(session, 2)).title == 'scooter'
+    assert (await courier_types.get_by_title(session, 'scooter')).id == 2
+    assert session.queries == 2
+
+    assert await courier_types.get_by_title(session, 'plane') is None
+    await courier_types.refresh(session, type_ids=[1, 2], titles=['foot'])
+    assert session.queries == 3
@@ -0,0 +1,45 @@
+from datetime import time
+
+from data.intervals import (to_minutes, to_windows, window_mask, overlaps, pack_minutes, packed_windows,
+                            format_window)
+from data.models import CourierInterval
+
+
+def test_to_windows():
+    intervals = [CourierInterval(time_start=time(11, 35), time_end=time(14, 5)),
+                 CourierInterval(time_start=time(9, 0), time_end=time(11, 0))]
+
+    assert to_minutes(time(23, 59)) == 1439
+    assert to_windows(intervals) == [(695, 845), (540, 660)]
+
+
+def test_packed_minutes():
+    minutes = pack_minutes([(time(11, 35), time(14, 5)), (time(23, 0), time(0, 30))])
+
+    assert minutes == [695, 845, 1380, 30]
+    assert packed_windows(minutes) == [(695, 845), (1380, 30)]
+    assert [format_window(*window) for window in packed_windows(minutes)] == ['11:35-14:05', '23:00-00:30']
+    assert packed_windows([]) == []
+
+
+def test_window_mask():
+    assert window_mask(0, 0) == 0b1
+    assert window_mask(1, 3) == 0b1110
+    assert window_mask(1430, 10) & window_mask(5, 5)
+    assert not window_mask(1430, 10) & window_mask(11, 1429)
+
+
+def test_overlaps():
+    courier_windows = [(695, 845), (540, 660)]
+    order_windows_matrix = [
+        [(540, 1080)],
+        [(960, 1290), (540, 720)],
+        [(0, 539)],
+        [(661, 694)],
+        [(660, 660)],
+        [(846, 900)],
+        []
+    ]
+
+    assert overlaps(courier_windows, order_windows_matrix) == [True, True, False, False, True, False, False]
+    assert overlaps([], order_windows_matrix) == [False] * len(order_windows_matrix)
@@ -0,0 +1,76 @@
+import pytest
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql.asyncpg import AsyncAdapt_asyncpg_cursor
+from aiohttp import web
+
+from tests.functions_for_testing import get_stub, create_couriers, create_orders
+from data.metrics import RequestStats, Metrics, instrument_engine, metrics_middleware, fetched_rows
+from handlers.metrics_handler import MetricsHandler
+from handlers.simple_handler import SimpleHandler
+
+
+def test_instrument_engine():
+    engine = create_engine('sqlite://')
+    instrument_engine(engine)
+    stats = RequestStats()
+
+    with engine.execution_options(request_stats=stats).connect() as conn:
+        conn.execute(text('SELECT 1'))
+        conn.execute(text('SELECT 2'))
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 3'))
+
+    assert stats.queries == 2
+    assert stats.db_time > 0
+
+
+def test_fetched_rows():
+    assert '_rows' in AsyncAdapt_asyncpg_cursor.__slots__
+    cursor = AsyncAdapt_asyncpg_cursor.__new__(AsyncAdapt_asyncpg_cursor)
+    cursor._rows, cursor.rowcount = [(1,), (2,), (3,)], -1
+    assert fetched_rows(cursor) == 3
+    cursor.rowcount = 2
+    assert fetched_rows(cursor) == 2
+    assert fetched_rows(SimpleNamespace(rowcount=-1, _rows=[(1,)])) == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware(aiohttp_client):
+    async def echo(request):
+        return SimpleHandler(None).create_response({'id': int(request.match_info['id'])}, 200)
+
+    app = web.Application(middlewares=[metrics_middleware])
+    app['metrics'], app['cache'] = Metrics(), None
+    app.add_routes([web.get('/echo/{id}', echo), web.get('/metrics', MetricsHandler().get_metrics)])
+    client = await aiohttp_client(app)
+
+    for i in range(3):
+        assert (await client.get(f'/echo/{i}')).status == 200
+    assert (await client.get('/missing')).status == 404
+    response = await client.get('/metrics')
+    body = await response.text()
+
+    assert response.status == 200
+    assert 'http_requests_total{method="GET",route="/echo/{id}",status="200"} 3' in body
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/echo/{id}"} 3' in body
+    assert app['metrics'].routes['GET', '/echo/{id}'].serialization_time > 0
+
+
+@pytest.mark.asyncio
+async def test_assign_metrics(client, pg_connection):
+    create_couriers(pg_connection, get_stub('success_create_couriers.json'))
+    create_orders(pg_connection, get_stub('success_create_orders.json'))
+
+    response = await client.post('/orders/assign', json=get_stub('success_assign_order.json'))
+    assert response.status == 200
+
+    metrics = client.server.app['metrics'].routes['POST', '/orders/assign']
+    assert metrics.count == 1
+    assert metrics.queries >= 2
+    assert metrics.rows >= 2
+    assert 0 < metrics.db_time < metrics.total_time
+
+    body = await (await client.get('/metrics')).text()
+    assert f'db_queries_total{{method="POST",route="/orders/assign"}} {metrics.queries}' in body
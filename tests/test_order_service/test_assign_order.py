@@ -1,4 +1,5 @@
 import pytest
+import asyncio
 from sqlalchemy.future import select
 from sqlalchemy import update
 
@@ -148,3 +149,31 @@ async def test_missing_courier_id(client, pg_connection):
         assert not order.is_assign
         assert order.assign_time is None
         assert order.courier_id is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_assign(client, pg_connection):
+    couriers_count = 200
+    data_couriers = {'data': [{'courier_id': i, 'courier_type': 'car', 'regions': [i % 5],
+                               'working_hours': ['00:00-23:59']} for i in range(1, couriers_count + 1)]}
+    data_orders = {'data': [{'order_id': i, 'weight': 10, 'region': i % 5,
+                             'delivery_hours': ['09:00-18:00']} for i in range(1, 1001)]}
+
+    create_couriers(pg_connection, data_couriers)
+    create_orders(pg_connection, data_orders)
+
+    responses = await asyncio.gather(*[
+        client.post('/orders/assign', json={'courier_id': i}) for i in range(1, couriers_count + 1)
+    ])
+    bodies = await asyncio.gather(*[response.json() for response in responses])
+    orders = {order.id: order for order in pg_connection.execute(select(Order)).fetchall()}
+
+    assigned_ids = [order['id'] for body in bodies for order in body['orders']]
+    assert all(response.status == 200 for response in responses)
+    assert len(assigned_ids) == len(set(assigned_ids))
+    assert len(assigned_ids) == sum(order.is_assign for order in orders.values())
+    assert sorted(assigned_ids) == sorted(orders)
+    for courier_id, body in enumerate(bodies, start=1):
+        assert sum(orders[order['id']].weight for order in body['orders']) <= 50
+        for order in body['orders']:
+            assert orders[order['id']].courier_id == courier_id
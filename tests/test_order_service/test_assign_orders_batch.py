@@ -0,0 +1,113 @@
+import pytest
+import asyncio
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
+
+from tests.functions_for_testing import get_stub, create_couriers, create_orders
+from data.models import Order, CourierType
+
+
+@pytest.mark.asyncio
+async def test_success_assign_batch(client, pg_connection):
+    data_couriers = get_stub('success_create_couriers.json')
+    data_orders = get_stub('success_create_orders.json')
+
+    create_couriers(pg_connection, data_couriers)
+    create_orders(pg_connection, data_orders)
+
+    response = await client.post('/orders/assign/batch', json={'couriers': [4, 2, 1]})
+    body = await response.json()
+    orders = {order.id: order for order in pg_connection.execute(select(Order)).fetchall()}
+    assign_time = body['couriers'][0]['assign_time']
+
+    assert response.status == 200
+    assert [courier['courier_id'] for courier in body['couriers']] == [4, 2, 1]
+    assert body['couriers'][0]['orders'] == [{'id': 2}]
+    assert body['couriers'][1] == {'courier_id': 2, 'orders': []}
+    assert body['couriers'][2]['orders'] == [{'id': 3}, {'id': 1}]
+    assert body['couriers'][2]['assign_time'] == assign_time
+    for order_id, courier_id in ((1, 1), (2, 4), (3, 1)):
+        assert orders[order_id].is_assign
+        assert orders[order_id].courier_id == courier_id
+        assert f'{orders[order_id].assign_time.isoformat()}Z' == assign_time
+
+
+@pytest.mark.asyncio
+async def test_assign_batch_courier_type_added_after_start(client, pg_connection):
+    pg_connection.execute(insert(CourierType.__table__).values(title='truck', carrying=100, coefficient=12))
+    create_couriers(pg_connection, {'data': [{'courier_id': 1, 'courier_type': 'truck', 'regions': [1],
+                                              'working_hours': ['00:00-23:59']}]})
+    create_orders(pg_connection, {'data': [{'order_id': 1, 'weight': 40, 'region': 1,
+                                            'delivery_hours': ['09:00-18:00']}]})
+
+    response = await client.post('/orders/assign/batch', json={'couriers': [1]})
+    body = await response.json()
+
+    assert response.status == 200
+    assert body['couriers'][0]['orders'] == [{'id': 1}]
+
+
+@pytest.mark.asyncio
+async def test_double_success_assign_batch(client, pg_connection):
+    data_couriers = get_stub('success_create_couriers.json')
+    data_orders = get_stub('success_create_orders.json')
+
+    create_couriers(pg_connection, data_couriers)
+    create_orders(pg_connection, data_orders)
+
+    response1 = await client.post('/orders/assign/batch', json={'couriers': [1, 4]})
+    response2 = await client.post('/orders/assign/batch', json={'couriers': [1, 4]})
+    body1 = await response1.json()
+    body2 = await response2.json()
+
+    assert response1.status == response2.status == 200
+    assert body1 == body2
+
+
+@pytest.mark.asyncio
+async def test_validation_couriers(client, pg_connection):
+    data_couriers = get_stub('success_create_couriers.json')
+    data_orders = get_stub('success_create_orders.json')
+
+    create_couriers(pg_connection, data_couriers)
+    create_orders(pg_connection, data_orders)
+
+    response = await client.post('/orders/assign/batch', json={'couriers': [1, 666]})
+    body = await response.json()
+    orders = pg_connection.execute(select(Order)).fetchall()
+
+    assert response.status == 400
+    assert body == {'validation_error': {'couriers': [{'id': 666}]}}
+    for order in orders:
+        assert not order.is_assign
+        assert order.courier_id is None
+
+
+@pytest.mark.asyncio
+async def test_assign_batch_concurrent_with_assign(client, pg_connection):
+    couriers_count = 200
+    data_couriers = {'data': [{'courier_id': i, 'courier_type': 'car', 'regions': [i % 5],
+                               'working_hours': ['00:00-23:59']} for i in range(1, couriers_count + 1)]}
+    data_orders = {'data': [{'order_id': i, 'weight': 10, 'region': i % 5,
+                             'delivery_hours': ['09:00-18:00']} for i in range(1, 1001)]}
+
+    create_couriers(pg_connection, data_couriers)
+    create_orders(pg_connection, data_orders)
+
+    batch_ids = list(range(1, couriers_count + 1, 2))
+    responses = await asyncio.gather(
+        client.post('/orders/assign/batch', json={'couriers': batch_ids}),
+        *[client.post('/orders/assign', json={'courier_id': i}) for i in range(2, couriers_count + 1, 2)]
+    )
+    bodies = await asyncio.gather(*[response.json() for response in responses])
+    orders = {order.id: order for order in pg_connection.execute(select(Order)).fetchall()}
+
+    assigned = {courier['courier_id']: courier['orders'] for courier in bodies[0]['couriers']}
+    assigned.update({courier_id: body['orders'] for courier_id, body in zip(range(2, couriers_count + 1, 2),
+                                                                            bodies[1:])})
+    assigned_ids = [order['id'] for orders_data in assigned.values() for order in orders_data]
+    assert all(response.status == 200 for response in responses)
+    assert sorted(assigned_ids) == sorted(orders)
+    for courier_id, orders_data in assigned.items():
+        for order in orders_data:
+            assert orders[order['id']].courier_id == courier_id
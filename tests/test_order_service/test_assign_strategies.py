@@ -0,0 +1,55 @@
+from data.models import Order
+from services.order_service import GreedyAssignStrategy, PackingAssignStrategy
+
+
+def create_orders(weights):
+    return [Order(id=i, weight=weight) for i, weight in enumerate(weights, start=1)]
+
+
+def test_greedy_strategy():
+    orders = create_orders([0.01, 0.23, 3, 4, 7, 9.5, 15])
+
+    selected = GreedyAssignStrategy().select(orders, 10)
+
+    assert [order.id for order in selected] == [1, 2, 3, 4]
+
+
+def test_packing_strategy():
+    orders = create_orders([0.01, 0.23, 3, 4, 7, 9.5, 15])
+
+    selected = PackingAssignStrategy().select(orders, 10)
+
+    assert [order.id for order in selected] == [3, 5]
+    assert sum(order.weight for order in selected) == 10
+
+
+def test_packing_strategy_precision():
+    orders = create_orders([0.01, 0.02, 4.99, 5.01, 5.02])
+
+    selected = PackingAssignStrategy().select(orders, 10)
+
+    assert round(sum(order.weight for order in selected), 2) == 10
+    assert sum(order.weight for order in selected) <= 10 + 1e-9
+
+
+def test_packing_strategy_fine_weights():
+    assert len(PackingAssignStrategy().select(create_orders([5.004, 5.004]), 10)) == 1
+    for weights in ([5.004, 5.004], [3.3349] * 3 + [0.01], [0.07] * 142 + [0.061]):
+        selected = PackingAssignStrategy().select(create_orders(weights), 10)
+        assert sum(order.weight for order in selected) <= 10
+
+    selected = PackingAssignStrategy(limit=0).select(create_orders([5.004, 5.004]), 10)
+    assert [order.id for order in selected] == [2]
+
+
+def test_packing_strategy_limit():
+    orders = create_orders([0.01, 0.23, 3, 4, 7, 9.5, 15])
+
+    selected = PackingAssignStrategy(limit=2).select(orders, 10)
+
+    assert [order.id for order in selected] == [1, 2, 6]
+
+
+def test_packing_strategy_nothing_fits():
+    assert PackingAssignStrategy().select(create_orders([15, 20]), 10) == []
+    assert PackingAssignStrategy().select([], 10) == []
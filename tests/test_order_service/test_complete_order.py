@@ -3,8 +3,8 @@ from datetime import timedelta, datetime
 from sqlalchemy.future import select
 from sqlalchemy import update
 
-from tests.functions_for_testing import get_stub, create_couriers, create_orders
-from data.models import Order, Region
+from tests.functions_for_testing import get_stub, create_couriers, create_orders, get_courier_rating
+from data.models import Courier, Order, Region
 
 
 @pytest.mark.asyncio
@@ -25,12 +25,15 @@ async def test_success_complete(client, pg_connection):
     order = pg_connection.execute(select(Order).where(Order.id == data_complete['order_id'])).fetchone()
     region = pg_connection.execute(select(Region).where(
         Region.courier_id == data_complete['courier_id'], Region.number_region == order.region_number)).fetchone()
+    regions = pg_connection.execute(select(Region).where(Region.courier_id == data_complete['courier_id'])).fetchall()
+    courier = pg_connection.execute(select(Courier).where(Courier.id == data_complete['courier_id'])).fetchone()
 
     assert response.status == 200
     assert body == {'order_id': 1}
     assert region.orders_count == 1
     assert region.sum_time == td.total_seconds()
     assert order.is_complete
+    assert courier.rating == get_courier_rating(regions)
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,75 @@
+import pytest
+from datetime import timedelta, datetime
+from sqlalchemy.future import select
+from sqlalchemy import update
+
+from tests.functions_for_testing import get_stub, create_couriers, create_orders
+from data.models import Courier, Order, Region
+
+
+def assign_orders(pg_connection, courier_id, order_ids, assign_time):
+    pg_connection.execute(update(Order.__table__).where(Order.id.in_(order_ids)).values(
+        courier_id=courier_id, is_assign=True, assign_time=assign_time))
+
+
+@pytest.mark.asyncio
+async def test_success_complete_batch(client, pg_connection):
+    data_couriers = get_stub('success_create_couriers.json')
+    data_orders = get_stub('success_create_orders.json')
+    assign_time = datetime(2021, 8, 25, 1, 0)
+    data_complete = {'data': [
+        {'courier_id': 1, 'order_id': 3, 'complete_time': '2021-08-25T01:45:00Z'},
+        {'courier_id': 1, 'order_id': 1, 'complete_time': '2021-08-25T01:15:00Z'}
+    ]}
+
+    create_couriers(pg_connection, data_couriers)
+    create_orders(pg_connection, data_orders)
+    assign_orders(pg_connection, 1, [1, 3], assign_time)
+
+    response = await client.post('/orders/complete/batch', json=data_complete)
+    body = await response.json()
+    orders = pg_connection.execute(select(Order).where(Order.id.in_([1, 3]))).fetchall()
+    regions = {region.number_region: region for region in pg_connection.execute(
+        select(Region).where(Region.courier_id == 1)).fetchall()}
+    courier = pg_connection.execute(select(Courier).where(Courier.id == 1)).fetchone()
+
+    assert response.status == 200
+    assert body == {'orders': [{'order_id': 3, 'status': 200}, {'order_id': 1, 'status': 200}]}
+    assert all(order.is_complete for order in orders)
+    assert regions[12].orders_count == 1
+    assert regions[12].sum_time == timedelta(minutes=15).total_seconds()
+    assert regions[22].orders_count == 1
+    assert regions[22].sum_time == timedelta(minutes=30).total_seconds()
+    assert courier.earning == 1000
+    assert courier.time_last_complete_order is None
+
+
+@pytest.mark.asyncio
+async def test_partially_invalid_complete_batch(client, pg_connection):
+    data_couriers = get_stub('success_create_couriers.json')
+    data_orders = get_stub('success_create_orders.json')
+    assign_time = datetime(2021, 8, 25, 1, 0)
+    data_complete = {'data': [
+        {'courier_id': 1, 'order_id': 1, 'complete_time': '2021-08-25T01:15:00Z'},
+        {'courier_id': 2, 'order_id': 3, 'complete_time': '2021-08-25T01:15:00Z'},
+        {'courier_id': 1, 'order_id': 2, 'complete_time': '2021-08-25T01:15:00Z'},
+        {'courier_id': 1, 'order_id': 3, 'complete_time': '2021-08-25T00:30:00Z'},
+        {'courier_id': 'a', 'order_id': 3, 'complete_time': '2021-08-25T01:30:00Z'}
+    ]}
+
+    create_couriers(pg_connection, data_couriers)
+    create_orders(pg_connection, data_orders)
+    assign_orders(pg_connection, 1, [1, 3], assign_time)
+
+    response = await client.post('/orders/complete/batch', json=data_complete)
+    body = await response.json()
+    orders = {order.id: order for order in pg_connection.execute(select(Order)).fetchall()}
+    courier = pg_connection.execute(select(Courier).where(Courier.id == 1)).fetchone()
+
+    assert response.status == 200
+    assert [order['status'] for order in body['orders']] == [200, 400, 400, 400, 400]
+    assert orders[1].is_complete
+    assert not orders[2].is_complete
+    assert not orders[3].is_complete
+    assert courier.earning == 0
+    assert courier.time_last_complete_order == datetime(2021, 8, 25, 1, 15)
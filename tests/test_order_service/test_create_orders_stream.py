@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy.future import select
+from json import dumps
+
+from tests.functions_for_testing import get_stub, interval_to_str
+from data.models import Order, OrderInterval
+from validators.json_stream import JsonStreamReader, JsonStreamError
+
+
+class BytesStream:
+    def __init__(self, data, size):
+        self.data = data
+        self.size = size
+
+    async def read(self, n):
+        chunk, self.data = self.data[:self.size], self.data[self.size:]
+        return chunk
+
+
+async def read_items(data, size=3):
+    return [item async for item in JsonStreamReader(BytesStream(data, size), read_size=size).items('data')]
+
+
+@pytest.mark.asyncio
+async def test_json_stream_reader():
+    data = {'meta': {'text': '}],"data"'}, 'n': 1,
+            'data': [{'order_id': 1, 'weight': 0.23, 'text': 'ü'}, 12345, -1.5e-10, None]}
+
+    assert await read_items(dumps(data, ensure_ascii=False).encode()) == data['data']
+    for invalid in (b'{"data": [1 2]}', b'{"data": [1,', b'[1]', b'{"order": []}', b'{"data": []} 1'):
+        with pytest.raises(JsonStreamError):
+            await read_items(invalid)
+
+
+@pytest.mark.asyncio
+async def test_json_stream_reader_bounded_buffer():
+    item = dumps({'order_id': 1, 'weight': 0.23, 'region': 12, 'delivery_hours': ['09:00-18:00']})
+    body = ('{"data": [' + item[:-1] + ' 1},' + ','.join([item] * 100000) + ']}').encode()
+    reader = JsonStreamReader(BytesStream(body, 64 * 1024))
+    with pytest.raises(JsonStreamError):
+        [item async for item in reader.items('data')]
+    assert len(reader.buffer) <= 64 * 1024
+
+    body = ('{"data": ["' + 'x' * 5000 + '"]}').encode()
+    reader = JsonStreamReader(BytesStream(body, 1024), read_size=1024, max_item_size=2048)
+    with pytest.raises(JsonStreamError):
+        [item async for item in reader.items('data')]
+    assert len(reader.buffer) <= 4096
+
+
+@pytest.mark.asyncio
+async def test_success_create_orders_stream(client, pg_connection):
+    data = get_stub('success_create_orders.json')
+    response = await client.post('/orders?stream=1', data=dumps(data), headers={'Content-Type': 'application/json'})
+    body = await response.json()
+
+    assert response.status == 201
+    assert body == {'orders': [{'id': 1}, {'id': 2}, {'id': 3}]}
+    for order_data in data['data']:
+        order = pg_connection.execute(select(Order).where(Order.id == order_data['order_id'])).fetchone()
+        intervals = pg_connection.execute(select(OrderInterval).where(
+            OrderInterval.order_id == order_data['order_id'])).fetchall()
+        assert order.weight == order_data['weight']
+        assert order.region_number == order_data['region']
+        assert sorted([interval_to_str(interval) for interval in intervals]) == sorted(order_data['delivery_hours'])
+
+
+@pytest.mark.asyncio
+async def test_success_create_orders_ndjson(client, pg_connection):
+    data = get_stub('success_create_orders.json')
+    body = '\n'.join(dumps(order_data) for order_data in data['data'])
+    response = await client.post('/orders', data=body, headers={'Content-Type': 'application/x-ndjson'})
+    orders = pg_connection.execute(select(Order)).fetchall()
+
+    assert response.status == 201
+    assert await response.json() == {'orders': [{'id': 1}, {'id': 2}, {'id': 3}]}
+    assert len(orders) == 3
+
+
+@pytest.mark.asyncio
+async def test_validation_create_orders_ndjson(client, pg_connection):
+    data = get_stub('success_create_orders.json')
+    data['data'][1]['weight'] = 100
+    body = '\n'.join(dumps(order_data) for order_data in data['data'])
+    response = await client.post('/orders', data=body, headers={'Content-Type': 'application/x-ndjson'})
+    order_intervals = pg_connection.execute(select(OrderInterval)).fetchall()
+    orders = pg_connection.execute(select(Order)).fetchall()
+
+    assert response.status == 400
+    assert await response.json() == {'validation_error': {'orders': [{'id': 2}]}}
+    assert set(map(len, (order_intervals, orders))) == {0}
+
+
+@pytest.mark.asyncio
+async def test_malformed_create_orders_ndjson(client, pg_connection):
+    response = await client.post('/orders', data='{"order_id": 1,', headers={'Content-Type': 'application/x-ndjson'})
+    orders = pg_connection.execute(select(Order)).fetchall()
+
+    assert response.status == 400
+    assert orders == []
+
+
+@pytest.mark.asyncio
+async def test_malformed_items_create_orders_stream(client, pg_connection):
+    data = get_stub('success_create_orders.json')
+    data['data'][1:1] = [12345, {'weight': 1}, [1, 2]]
+    response = await client.post('/orders?stream=1', data=dumps(data), headers={'Content-Type': 'application/json'})
+    orders = pg_connection.execute(select(Order)).fetchall()
+
+    assert response.status == 400
+    assert await response.json() == {'validation_error': {'orders': [{'id': None}, {'id': None}, {'id': None}]}}
+    assert orders == []
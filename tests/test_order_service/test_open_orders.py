@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy.future import select
+from sqlalchemy import update
+
+from tests.functions_for_testing import get_stub, create_couriers, create_orders
+from services.open_orders import OpenOrdersIndex, open_order
+from data.intervals import window_mask
+from data.models import Order
+from app import create_app
+from tests.query_budget import QueryBudgetMonitor
+
+
+def test_open_orders_candidates():
+    open_orders = OpenOrdersIndex()
+    open_orders.add(map(open_order, [
+        {'id': 1, 'weight': 0.23, 'region_number': 12, 'delivery_minutes': [540, 1080]},
+        {'id': 2, 'weight': 15, 'region_number': 1, 'delivery_minutes': [540, 1080]},
+        {'id': 3, 'weight': 0.01, 'region_number': 22, 'delivery_minutes': [540, 720, 960, 1290]},
+        {'id': 4, 'weight': 0.23, 'region_number': 12, 'delivery_minutes': [0, 60]},
+        {'id': 5, 'weight': 0.1, 'region_number': 12, 'delivery_minutes': [600, 660]}
+    ]))
+    courier_mask = window_mask(695, 845) | window_mask(540, 660)
+
+    candidates = open_orders.candidates([1, 12, 22], 10, courier_mask)
+    assert [order.id for order in candidates] == [3, 5, 1]
+
+    open_orders.remove([5, 6])
+    assert [order.id for order in open_orders.candidates([1, 12, 22], 50, courier_mask)] == [3, 1, 2]
+    assert open_orders.regions[12] == [(0.23, 1), (0.23, 4)]
+
+
+@pytest.fixture
+async def index_client(aiohttp_client, tmp_db_name, pg_connection, monkeypatch):
+    monkeypatch.setenv('OPEN_ORDERS_INDEX', '1')
+    create_couriers(pg_connection, get_stub('success_create_couriers.json'))
+    create_orders(pg_connection, get_stub('success_create_orders.json'))
+
+    app = create_app(db_name=tmp_db_name)
+    query_budget = QueryBudgetMonitor(app)
+    client = await aiohttp_client(app)
+    try:
+        yield client
+    finally:
+        await client.close()
+    query_budget.check()
+
+
+@pytest.mark.asyncio
+async def test_assign_from_index(index_client, pg_connection):
+    response = await index_client.post('/orders/assign', json=get_stub('success_assign_order.json'))
+    body = await response.json()
+    orders = pg_connection.execute(select(Order).where(Order.is_assign == True)).fetchall()
+
+    assert response.status == 200
+    assert body['orders'] == [{'id': 3}, {'id': 1}]
+    assert {(order.id, order.courier_id) for order in orders} == {(1, 1), (3, 1)}
+    assert {f'{order.assign_time.isoformat()}Z' for order in orders} == {body['assign_time']}
+
+
+@pytest.mark.asyncio
+async def test_assign_from_stale_index(index_client, pg_connection):
+    pg_connection.execute(update(Order).where(Order.id == 3).values(is_assign=True, courier_id=2))
+
+    response = await index_client.post('/orders/assign', json=get_stub('success_assign_order.json'))
+    body = await response.json()
+    order = pg_connection.execute(select(Order).where(Order.id == 3)).fetchone()
+
+    assert response.status == 200
+    assert body['orders'] == [{'id': 1}]
+    assert order.courier_id == 2
+    assert 3 not in index_client.app['open_orders'].orders
+
+
+@pytest.mark.asyncio
+async def test_assign_past_rolled_back_claim(index_client, pg_connection):
+    with pg_connection.engine.connect() as competing:
+        transaction = competing.begin()
+        competing.execute(select(Order.id).where(Order.id == 3).with_for_update())
+
+        response = await index_client.post('/orders/assign', json=get_stub('success_assign_order.json'))
+        body = await response.json()
+        transaction.rollback()
+
+    order = pg_connection.execute(select(Order).where(Order.id == 3)).fetchone()
+
+    assert response.status == 200
+    assert body['orders'] == [{'id': 1}]
+    assert not order.is_assign
+    assert 3 in index_client.app['open_orders'].orders
+
+
+@pytest.mark.asyncio
+async def test_created_orders_are_indexed(index_client, pg_connection):
+    data_orders = {'data': [{'order_id': 4, 'weight': 0.02, 'region': 1, 'delivery_hours': ['10:00-10:30']}]}
+
+    response = await index_client.post('/orders', json=data_orders)
+    assert response.status == 201
+
+    response = await index_client.post('/orders/assign', json=get_stub('success_assign_order.json'))
+    body = await response.json()
+    assert body['orders'] == [{'id': 3}, {'id': 4}, {'id': 1}]
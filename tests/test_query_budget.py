@@ -0,0 +1,64 @@
+import pytest
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+from aiohttp import web
+
+from tests.query_budget import QueryBudget, QueryBudgetMonitor, QUERY_BUDGETS, MAX_BUDGET_OVERRIDE, chunks, items
+from data.metrics import Metrics, instrument_engine, metrics_middleware
+from handlers.simple_handler import SimpleHandler
+
+
+def test_query_budget_limit():
+    assert QueryBudget(3).limit(None) == 3
+    assert QueryBudget(3, 5, items('orders')).limit({'orders': [{}, {}]}) == 13
+    assert QueryBudget(3, 5, items('orders')).limit({'orders': 12}) == 3
+    assert QueryBudget(3, 5, items('orders')).limit(None) == 3
+    assert QueryBudget(0, 3, chunks('data')).limit({'data': [{}] * 1001}) == 6
+    assert QueryBudget(0, 3, chunks('data')).limit({'data': range(3)}) == 3
+    assert QueryBudget(0, 3, chunks('data')).limit([]) == 3
+
+
+@pytest.mark.asyncio
+async def test_query_budget_monitor(aiohttp_client):
+    engine = create_engine('sqlite://')
+    instrument_engine(engine)
+
+    async def lookup(request):
+        orders = (await request.json())['orders']
+        with engine.execution_options(request_stats=request['request_stats']).connect() as conn:
+            for i in orders:
+                conn.execute(text(f'SELECT {i}'))
+        # the response lists more orders than asked for, the budget still follows the request
+        return SimpleHandler(None).create_response({'orders': [{'id': i} for i in range(10)]}, 200)
+
+    app = web.Application(middlewares=[metrics_middleware])
+    app['metrics'], app['db_engine'] = Metrics(), SimpleNamespace(sync_engine=engine)
+    app.add_routes([web.post('/lookup', lookup), web.post('/other', lookup), web.post('/orders/assign', lookup)])
+    query_budget = QueryBudgetMonitor(app, {('POST', '/lookup'): QueryBudget(1, 1, items('orders')),
+                                            ('POST', '/orders/assign'): QueryBudget(8 + MAX_BUDGET_OVERRIDE + 1)})
+    client = await aiohttp_client(app)
+
+    assert (await client.post('/lookup', json={'orders': [0, 1, 2]})).status == 200
+    assert (await client.get('/missing')).status == 404
+    assert query_budget.violations == []
+
+    query_budget.budgets[('POST', '/lookup')] = QueryBudget(2)
+    assert (await client.post('/lookup', json={'orders': [0, 1, 2]})).status == 200
+    assert (await client.post('/other', json={'orders': []})).status == 200
+    assert (await client.post('/orders/assign', json={'orders': []})).status == 200
+    await client.close()
+
+    assert query_budget.violations == [
+        'POST /lookup: 3 queries, budget is 2\n    SELECT 0\n    SELECT 1\n    SELECT 2',
+        'POST /other: no query budget declared for the route',
+        'POST /orders/assign: budget overridden to (11, 0), declared is (8, 0)'
+    ]
+    with pytest.raises(pytest.fail.Exception):
+        query_budget.check()
+
+
+def test_every_route_has_budget():
+    from app import create_app
+
+    routes = {(route.method, route.resource.canonical) for route in create_app().router.routes()}
+    assert routes - {('HEAD', '/couriers/{courier_id}'), ('HEAD', '/metrics')} == set(QUERY_BUDGETS)
@@ -0,0 +1,14 @@
+import pytest
+from json import loads
+
+from handlers.simple_handler import SimpleHandler, stdlib_serializer, orjson_serializer, orjson
+
+
+@pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+def test_orjson_serializer_big_integers():
+    json_data = {'validation_error': {'orders': [{'id': 100000000000000000000}]}}
+
+    assert orjson_serializer(json_data) == stdlib_serializer(json_data)
+    response = SimpleHandler(None, orjson_serializer).create_response(json_data, 400)
+    assert response.status == 400
+    assert loads(response.body) == json_data
@@ -0,0 +1,127 @@
+from marshmallow import ValidationError, fields
+from marshmallow.utils import is_collection
+from collections.abc import Mapping
+from datetime import time
+import re
+
+from validators.validate_fields import Interval
+
+# the same patterns datetime.strptime builds for '%H' and '%M'
+TIME_PATTERN = re.compile(r'(2[0-3]|[0-1]\d|\d):([0-5]\d|\d)')
+
+
+def parse_time(value):
+    match = TIME_PATTERN.fullmatch(value)
+    if match is None:
+        raise ValueError(value)
+    return time(int(match.group(1)), int(match.group(2)))
+
+
+def load_interval(interval):
+    try:
+        parts = interval.split('-')
+        return [parse_time(parts[0]), parse_time(parts[1])]
+    except Exception:
+        raise ValidationError(f'"{interval}" cannot be formatted as a interval.')
+
+
+def load_integer(value):
+    if type(value) is int:
+        return value
+    if value is True or value is False:
+        raise ValidationError('Not a valid integer.')
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValidationError('Not a valid integer.')
+
+
+def load_float(value):
+    if value is True or value is False:
+        raise ValidationError('Not a valid number.')
+    try:
+        number = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValidationError('Not a valid number.')
+    if number != number or number in (float('inf'), float('-inf')):
+        raise ValidationError('Special numeric values (nan or infinity) are not permitted.')
+    return number
+
+
+def load_string(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        try:
+            return value.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ValidationError('Not a valid utf-8 string.')
+    raise ValidationError('Not a valid string.')
+
+
+def compile_list(field):
+    load_inner = compile_field(field.inner)
+
+    def load_list(value):
+        if type(value) is not list and not is_collection(value):
+            raise ValidationError('Not a valid list.')
+        return [load_inner(each) for each in value]
+    return load_list
+
+
+def compile_field(field):
+    if isinstance(field, Interval):
+        load = load_interval
+    elif isinstance(field, fields.Integer) and not field.strict:
+        load = load_integer
+    elif isinstance(field, fields.Float) and not field.allow_nan:
+        load = load_float
+    elif isinstance(field, fields.String):
+        load = load_string
+    elif isinstance(field, fields.List):
+        load = compile_list(field)
+    else:
+        load = field.deserialize
+
+    validators = field.validators
+    allow_none = field.allow_none
+
+    def load_field(value):
+        if value is None:
+            if allow_none:
+                return None
+            raise ValidationError('Field may not be null.')
+        result = load(value)
+        for validator in validators:
+            validator(result)
+        return result
+    return load_field
+
+
+class CompiledSchema:
+    def __init__(self, schema_class):
+        schema = schema_class()
+        self.loaders = {name: compile_field(field) for name, field in schema.fields.items()}
+        self.required = {name for name, field in schema.fields.items() if field.required}
+
+    def load(self, data):
+        if not isinstance(data, Mapping):
+            raise ValidationError('Invalid input type.')
+        result = {}
+        for key, value in data.items():
+            loader = self.loaders.get(key)
+            if loader is None:
+                raise ValidationError(f'Unknown field: {key}.')
+            result[key] = loader(value)
+        if not self.required.issubset(result):
+            raise ValidationError('Missing data for required field.')
+        return result
+
+
+compiled_schemes = {}
+
+
+def compiled(schema_class):
+    if schema_class not in compiled_schemes:
+        compiled_schemes[schema_class] = CompiledSchema(schema_class)
+    return compiled_schemes[schema_class]
@@ -1,60 +1,102 @@
 from marshmallow import ValidationError
-from sqlalchemy.future import select
 from aiohttp import web
 
+from validators.compiled_schemes import compiled
 from validators.validate_schemes import CreateCouriersSchema, PatchCourierSchema, GetCourierInfoSchema
-from data.db_functions import query_result, get_courier_by_id
-from data.models import CourierType
+from data.db_functions import get_courier_by_id, get_existing_values
+from data.models import Courier
+from validators.json_stream import iter_request_items, iter_chunks, JsonStreamError, STREAM_CHUNK_SIZE
 
 
 class CourierValidator:
+    @staticmethod
+    async def validate_couriers(async_session, courier_types, couriers_data, seen_ids):
+        schema = compiled(CreateCouriersSchema)
+        not_validated_ids = []
+
+        results = {}
+        for i, courier_data in enumerate(couriers_data):
+            try:
+                results[i] = schema.load(courier_data)
+            except ValidationError:
+                not_validated_ids.append((i, courier_data.get('courier_id') if isinstance(courier_data, dict) else None))
+
+        courier_ids = {result['courier_id'] for result in results.values()}
+        existing_ids = await get_existing_values(async_session, Courier.id, courier_ids)
+        await courier_types.refresh(async_session, titles={result['courier_type'] for result in results.values()})
+        validated = []
+        for i, result in results.items():
+            courier_type = result['courier_type'] = courier_types.by_title.get(result['courier_type'])
+            if not courier_type or result['courier_id'] in existing_ids or result['courier_id'] in seen_ids:
+                not_validated_ids.append((i, couriers_data[i]['courier_id']))
+                continue
+            seen_ids.add(result['courier_id'])
+            validated.append(result)
+        return validated, [id for i, id in sorted(not_validated_ids)]
+
     @staticmethod
     def validate_create_couriers_service(func):
         async def wrapper(_, request: web.Request):
-            async_session = request.app['async_session']
-            schema = CreateCouriersSchema()
+            async_session = request['async_session']
+            courier_types = request.app['courier_types']
             request_data = await request.json()
-            not_validated_ids = []
 
-            for i, courier_data in enumerate(request_data['data']):
-                try:
-                    result = schema.load(courier_data)
-                    courier = await get_courier_by_id(async_session, result['courier_id'])
-                    result['courier_type'] = await query_result(
-                        async_session, select(CourierType).where(CourierType.title == result['courier_type']))
-
-                    if not result['courier_type'] or courier:
-                        raise ValidationError('')
-                except ValidationError:
-                    not_validated_ids.append(courier_data['courier_id'])
-                    continue
-
-                for key in result:
-                    request_data['data'][i][key] = result[key]
+            validated, not_validated_ids = await CourierValidator.validate_couriers(
+                async_session, courier_types, request_data['data'], set())
             if not_validated_ids:
                 return {'validation_error': {'couriers': [{'id': id} for id in not_validated_ids]}}, 400
 
+            request_data['data'] = validated
             return await func(_, async_session, request_data)
         return wrapper
 
+    @staticmethod
+    def validate_create_couriers_stream_service(func):
+        async def wrapper(_, request: web.Request):
+            async_session = request['async_session']
+            courier_types = request.app['courier_types']
+            not_validated_ids = []
+            seen_ids = set()
+
+            async def validated_chunks():
+                async for couriers_data in iter_chunks(iter_request_items(request), STREAM_CHUNK_SIZE):
+                    validated, not_validated = await CourierValidator.validate_couriers(
+                        async_session, courier_types, couriers_data, seen_ids)
+                    not_validated_ids.extend(not_validated)
+                    if not not_validated_ids:
+                        yield validated
+
+            request_data = {'chunks': validated_chunks(), 'not_validated_ids': not_validated_ids}
+            try:
+                return await func(_, async_session, request_data)
+            except JsonStreamError:
+                return None, 400
+        return wrapper
+
     @staticmethod
     def validate_patch_courier_service(func):
         async def wrapper(_, request: web.Request):
-            async_session = request.app['async_session']
-            schema = PatchCourierSchema()
+            async_session = request['async_session']
+            courier_types = request.app['courier_types']
+            schema = compiled(PatchCourierSchema)
             request_data = await request.json()
             request_data['courier_id'] = request.match_info.get('courier_id', None)
 
             try:
                 result = schema.load(request_data)
-                courier = result['courier'] = await get_courier_by_id(async_session, result['courier_id'])
+                courier = result['courier'] = await get_courier_by_id(
+                    async_session, result['courier_id'], loader='info')
+                if not courier:
+                    raise ValidationError('')
                 if 'courier_type' in result:
-                    courier_type = result['courier_type'] = await query_result(
-                        async_session, select(CourierType).where(CourierType.title == result['courier_type']))
+                    courier_type = result['courier_type'] = await courier_types.get_by_title(
+                        async_session, result['courier_type'])
                     if not courier_type:
                         raise ValidationError('')
-                if not courier:
-                    raise ValidationError('')
+                else:
+                    result['courier_type'] = await courier_types.get_by_id(async_session, courier.type_id)
+                    if not result['courier_type']:
+                        raise ValidationError('')
             except ValidationError:
                 return None, 400
 
@@ -68,15 +110,20 @@ class CourierValidator:
     @staticmethod
     def validate_get_courier_info_service(func):
         async def wrapper(_, request: web.Request):
-            async_session = request.app['async_session']
-            schema = GetCourierInfoSchema()
+            async_session = request['async_session']
+            courier_types = request.app['courier_types']
+            schema = compiled(GetCourierInfoSchema)
             request_data = {}
 
             try:
                 result = schema.load(request.match_info)
-                courier = result['courier'] = await get_courier_by_id(async_session, result['courier_id'])
+                courier = result['courier'] = await get_courier_by_id(
+                    async_session, result['courier_id'], loader='info')
                 if not courier:
                     raise ValidationError('')
+                result['courier_type'] = await courier_types.get_by_id(async_session, courier.type_id)
+                if not result['courier_type']:
+                    raise ValidationError('')
             except ValidationError:
                 return None, 400
 
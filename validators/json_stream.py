@@ -0,0 +1,140 @@
+from codecs import getincrementaldecoder
+from json import JSONDecoder
+
+NDJSON_CONTENT_TYPES = {'application/x-ndjson', 'application/jsonl'}
+WHITESPACE = ' \t\n\r'
+STREAM_CHUNK_SIZE = 1000
+NUMBER_CHARS = '0123456789+-.eE'
+# longest literal a read can cut off: '-Infinity'
+TRUNCATION_WINDOW = 9
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+def is_stream_request(request):
+    return request.content_type in NDJSON_CONTENT_TYPES or request.query.get('stream') in ('1', 'true')
+
+
+class JsonStreamReader:
+    def __init__(self, stream, read_size=64 * 1024, max_item_size=1024 * 1024):
+        self.stream = stream
+        self.read_size = read_size
+        self.max_item_size = max_item_size
+        self.decoder = JSONDecoder()
+        self.text_decoder = getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    async def fill(self):
+        if self.eof:
+            return False
+        data = await self.stream.read(self.read_size)
+        if not data:
+            self.eof = True
+        if self.position > len(self.buffer) // 2:
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+        try:
+            self.buffer += self.text_decoder.decode(data, final=self.eof)
+        except UnicodeDecodeError as error:
+            raise JsonStreamError(str(error))
+        return True
+
+    async def peek(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not await self.fill():
+                return None
+
+    async def expect(self, char):
+        if await self.peek() != char:
+            raise JsonStreamError(f'Expected "{char}" at position {self.position}')
+        self.position += 1
+
+    async def value(self):
+        await self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # a number running up to the end of the buffer may continue in the next read, even after a
+                # prefix that parses on its own, as in '1.5e' + '-3'
+                number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                if self.eof or (self.buffer[end:].lstrip(NUMBER_CHARS) if number else end < len(self.buffer)):
+                    self.position = end
+                    return value
+            except ValueError as error:
+                # a value cut off by the end of the buffer fails at its tail, an earlier error will not go away
+                truncated = error.pos >= len(self.buffer) - TRUNCATION_WINDOW or error.msg.startswith('Unterminated')
+                if self.eof or not truncated:
+                    raise JsonStreamError(str(error))
+            if len(self.buffer) - self.position > self.max_item_size:
+                raise JsonStreamError(f'Value at position {self.position} is longer than {self.max_item_size}')
+            await self.fill()
+
+    async def items(self, key):
+        await self.expect('{')
+        found = False
+        while await self.peek() != '}':
+            name = await self.value()
+            if not isinstance(name, str):
+                raise JsonStreamError(f'Expected a field name at position {self.position}')
+            await self.expect(':')
+            if name == key and not found:
+                found = True
+                async for item in self.array_items():
+                    yield item
+            else:
+                await self.value()
+            if await self.peek() == ',':
+                self.position += 1
+                if await self.peek() == '}':
+                    raise JsonStreamError(f'Unexpected "}}" at position {self.position}')
+            elif await self.peek() != '}':
+                raise JsonStreamError(f'Expected "," or "}}" at position {self.position}')
+        self.position += 1
+        if not found:
+            raise JsonStreamError(f'Missing "{key}" field')
+        if await self.peek() is not None:
+            raise JsonStreamError('Extra data after JSON document')
+
+    async def array_items(self):
+        await self.expect('[')
+        if await self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield await self.value()
+            char = await self.peek()
+            self.position += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise JsonStreamError(f'Expected "," or "]" at position {self.position - 1}')
+
+    async def lines(self):
+        while await self.peek() is not None:
+            yield await self.value()
+
+
+def iter_request_items(request, key='data'):
+    reader = JsonStreamReader(request.content)
+    if request.content_type in NDJSON_CONTENT_TYPES:
+        return reader.lines()
+    return reader.items(key)
+
+
+async def iter_chunks(items, size):
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
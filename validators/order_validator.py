@@ -1,50 +1,94 @@
 from marshmallow import ValidationError
 from aiohttp import web
 
-from validators.validate_schemes import CreateOrdersSchema, AssignOrderSchema, CompleteOrderSchema
-from data.db_functions import get_order_by_id, get_courier_by_id
+from validators.compiled_schemes import compiled
+from validators.validate_schemes import (CreateOrdersSchema, AssignOrderSchema, AssignOrdersBatchSchema,
+                                        CompleteOrderSchema)
+from data.db_functions import (get_order_by_id, get_courier_by_id, get_existing_values, get_couriers_by_ids,
+                               get_orders_by_ids)
+from data.models import Order
+from validators.json_stream import iter_request_items, iter_chunks, JsonStreamError, STREAM_CHUNK_SIZE
 
 
 class OrderValidator:
+    @staticmethod
+    async def validate_orders(async_session, orders_data, seen_ids):
+        schema = compiled(CreateOrdersSchema)
+        not_validated_ids = []
+
+        results = {}
+        for i, order_data in enumerate(orders_data):
+            try:
+                results[i] = schema.load(order_data)
+            except ValidationError:
+                # stream items are arbitrary JSON, so the id is echoed back only when there is one to read
+                not_validated_ids.append((i, order_data.get('order_id') if isinstance(order_data, dict) else None))
+
+        order_ids = {result['order_id'] for result in results.values()}
+        existing_ids = await get_existing_values(async_session, Order.id, order_ids)
+        validated = []
+        for i, result in results.items():
+            if result['order_id'] in existing_ids or result['order_id'] in seen_ids:
+                not_validated_ids.append((i, orders_data[i]['order_id']))
+                continue
+            seen_ids.add(result['order_id'])
+            validated.append(result)
+        return validated, [id for i, id in sorted(not_validated_ids)]
+
     @staticmethod
     def validate_create_orders_service(func):
         async def wrapper(_, request: web.Request):
-            async_session = request.app['async_session']
-            schema = CreateOrdersSchema()
+            async_session = request['async_session']
             request_data = await request.json()
-            not_validated_ids = []
-
-            for i, order_data in enumerate(request_data['data']):
-                try:
-                    result = schema.load(order_data)
-                    order = await get_order_by_id(async_session, result['order_id'])
-
-                    if order:
-                        raise ValidationError('')
-                except ValidationError:
-                    not_validated_ids.append(order_data['order_id'])
-                    continue
 
-                for key in result:
-                    request_data['data'][i][key] = result[key]
+            validated, not_validated_ids = await OrderValidator.validate_orders(
+                async_session, request_data['data'], set())
             if not_validated_ids:
                 return {'validation_error': {'orders': [{'id': id} for id in not_validated_ids]}}, 400
 
+            request_data['data'] = validated
             return await func(_, async_session, request_data)
         return wrapper
 
+    @staticmethod
+    def validate_create_orders_stream_service(func):
+        async def wrapper(_, request: web.Request):
+            async_session = request['async_session']
+            not_validated_ids = []
+            seen_ids = set()
+
+            async def validated_chunks():
+                async for orders_data in iter_chunks(iter_request_items(request), STREAM_CHUNK_SIZE):
+                    validated, not_validated = await OrderValidator.validate_orders(
+                        async_session, orders_data, seen_ids)
+                    not_validated_ids.extend(not_validated)
+                    if not not_validated_ids:
+                        yield validated
+
+            request_data = {'chunks': validated_chunks(), 'not_validated_ids': not_validated_ids}
+            try:
+                return await func(_, async_session, request_data)
+            except JsonStreamError:
+                return None, 400
+        return wrapper
+
     @staticmethod
     def validate_assign_order_service(func):
         async def wrapper(_, request: web.Request):
-            async_session = request.app['async_session']
-            schema = AssignOrderSchema()
+            async_session = request['async_session']
+            courier_types = request.app['courier_types']
+            schema = compiled(AssignOrderSchema)
             request_data = await request.json()
 
             try:
                 result = schema.load(request_data)
-                courier = result['courier'] = await get_courier_by_id(async_session, result['courier_id'])
+                courier = result['courier'] = await get_courier_by_id(
+                    async_session, result['courier_id'], loader='active_orders', for_update=True)
                 if not courier:
                     raise ValidationError('')
+                result['courier_type'] = await courier_types.get_by_id(async_session, courier.type_id)
+                if not result['courier_type']:
+                    raise ValidationError('')
             except ValidationError:
                 return None, 400
 
@@ -55,24 +99,59 @@ class OrderValidator:
             return await func(_, async_session, request_data)
         return wrapper
 
+    @staticmethod
+    def validate_assign_orders_batch_service(func):
+        async def wrapper(_, request: web.Request):
+            async_session = request['async_session']
+            courier_types = request.app['courier_types']
+            schema = compiled(AssignOrdersBatchSchema)
+            request_data = await request.json()
+
+            try:
+                result = schema.load(request_data)
+            except ValidationError:
+                return None, 400
+
+            courier_ids = list(dict.fromkeys(result['couriers']))
+            couriers = await get_couriers_by_ids(async_session, courier_ids, loader='active_orders', for_update=True)
+            not_validated_ids = [id for id in courier_ids if id not in couriers]
+            if not_validated_ids:
+                return {'validation_error': {'couriers': [{'id': id} for id in not_validated_ids]}}, 400
+
+            await courier_types.refresh(async_session, type_ids={courier.type_id for courier in couriers.values()})
+            request_data['couriers'] = [couriers[id] for id in courier_ids]
+            request_data['courier_types'] = {courier.id: courier_types.by_id.get(courier.type_id)
+                                             for courier in couriers.values()}
+            not_validated_ids = [id for id in courier_ids if request_data['courier_types'][id] is None]
+            if not_validated_ids:
+                return {'validation_error': {'couriers': [{'id': id} for id in not_validated_ids]}}, 400
+
+            return await func(_, async_session, request_data)
+        return wrapper
+
     @staticmethod
     def validate_complete_order_service(func):
         async def wrapper(_, request: web.Request):
-            async_session = request.app['async_session']
-            schema = CompleteOrderSchema()
+            async_session = request['async_session']
+            courier_types = request.app['courier_types']
+            schema = compiled(CompleteOrderSchema)
             request_data = await request.json()
 
             try:
                 result = schema.load(request_data)
-                courier = result['courier'] = await get_courier_by_id(async_session, result['courier_id'])
+                courier = result['courier'] = await get_courier_by_id(
+                    async_session, result['courier_id'], loader='base', for_update=True)
                 order = result['order'] = await get_order_by_id(async_session, result['order_id'])
                 complete_time = result['complete_time'] = result['complete_time'].replace(tzinfo=None)
-                if not courier or not order or order.courier != courier or not order.is_assign:
+                if not courier or not order or order.courier_id != courier.id or not order.is_assign:
                     raise ValidationError('')
                 if courier.time_last_complete_order is None and complete_time <= order.assign_time:
                     raise ValidationError('')
                 if courier.time_last_complete_order is not None and complete_time <= courier.time_last_complete_order:
                     raise ValidationError('')
+                result['courier_type'] = await courier_types.get_by_id(async_session, courier.type_id)
+                if not result['courier_type']:
+                    raise ValidationError('')
             except ValidationError:
                 return None, 400
 
@@ -82,3 +161,42 @@ class OrderValidator:
 
             return await func(_, async_session, request_data)
         return wrapper
+
+    @staticmethod
+    def validate_complete_orders_batch_service(func):
+        async def wrapper(_, request: web.Request):
+            async_session = request['async_session']
+            courier_types = request.app['courier_types']
+            schema = compiled(CompleteOrderSchema)
+            request_data = await request.json()
+            results = []
+
+            loaded = []
+            for i, order_data in enumerate(request_data['data']):
+                try:
+                    result = schema.load(order_data)
+                    result['complete_time'] = result['complete_time'].replace(tzinfo=None)
+                    loaded.append((i, result))
+                    results.append({'order_id': result['order_id'], 'status': 200})
+                except ValidationError:
+                    order_id = order_data.get('order_id') if isinstance(order_data, dict) else None
+                    results.append({'order_id': order_id, 'status': 400})
+
+            couriers = await get_couriers_by_ids(
+                async_session, {result['courier_id'] for i, result in loaded}, for_update=True)
+            orders = await get_orders_by_ids(async_session, {result['order_id'] for i, result in loaded})
+            await courier_types.refresh(async_session, type_ids={courier.type_id for courier in couriers.values()})
+
+            validated = []
+            for i, result in loaded:
+                courier = result['courier'] = couriers.get(result['courier_id'])
+                order = result['order'] = orders.get(result['order_id'])
+                courier_type = result['courier_type'] = courier_types.by_id.get(courier.type_id) if courier else None
+                if not courier_type or not order or order.courier_id != courier.id or not order.is_assign:
+                    results[i]['status'] = 400
+                    continue
+                result['response'] = results[i]
+                validated.append(result)
+
+            return await func(_, async_session, {'data': validated, 'results': results})
+        return wrapper
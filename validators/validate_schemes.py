@@ -33,6 +33,10 @@ class AssignOrderSchema(Schema):
     courier_id = Integer(required=True)
 
 
+class AssignOrdersBatchSchema(Schema):
+    couriers = List(Integer(), required=True)
+
+
 class CompleteOrderSchema(Schema):
     courier_id = Integer(required=True)
     order_id = Integer(required=True)